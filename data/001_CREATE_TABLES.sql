@@ -149,4 +149,10 @@ CREATE TABLE IF NOT EXISTS logs (
     table_cible TEXT,
     cible_id INTEGER,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS app_settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
\ No newline at end of file
@@ -1,6 +1,10 @@
 -- Désactiver temporairement les contraintes pour éviter les erreurs de dépendance
 PRAGMA foreign_keys = OFF;
 
+DROP TABLE IF EXISTS stats_tags;
+DROP TABLE IF EXISTS stats_contacts_repartition;
+DROP TABLE IF EXISTS stats_counters;
+DROP TABLE IF EXISTS contacts_fts;
 DROP TABLE IF EXISTS logs;
 DROP TABLE IF EXISTS tache_contacts;
 DROP TABLE IF EXISTS taches;
@@ -16,5 +20,8 @@ DROP TABLE IF EXISTS contacts;
 DROP TABLE IF EXISTS projets;
 DROP TABLE IF EXISTS users;
 
+-- Schéma supprimé : toutes les migrations seront rejouées au prochain démarrage
+PRAGMA user_version = 0;
+
 -- Réactiver les contraintes
 PRAGMA foreign_keys = ON;
\ No newline at end of file
@@ -0,0 +1,60 @@
+-- Index plein texte des contacts (FTS5)
+-- rowid = contacts.id ; recherche par préfixe et insensible aux accents
+
+CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+    nom,
+    prenom,
+    societe,
+    poste,
+    ville,
+    coordonnees,
+    notes,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- Synchronisation avec la table contacts
+CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+    INSERT INTO contacts_fts (rowid, nom, prenom, societe, poste, ville, coordonnees, notes)
+    VALUES (
+        new.id, new.nom, new.prenom, new.societe, new.poste, new.adresse_ville,
+        (SELECT group_concat(valeur, ' ') FROM coordonnees WHERE contact_id = new.id),
+        new.notes
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS contacts_fts_au AFTER UPDATE ON contacts BEGIN
+    DELETE FROM contacts_fts WHERE rowid = old.id;
+    INSERT INTO contacts_fts (rowid, nom, prenom, societe, poste, ville, coordonnees, notes)
+    VALUES (
+        new.id, new.nom, new.prenom, new.societe, new.poste, new.adresse_ville,
+        (SELECT group_concat(valeur, ' ') FROM coordonnees WHERE contact_id = new.id),
+        new.notes
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+    DELETE FROM contacts_fts WHERE rowid = old.id;
+END;
+
+-- Synchronisation avec la table coordonnees
+CREATE TRIGGER IF NOT EXISTS coordonnees_fts_ai AFTER INSERT ON coordonnees BEGIN
+    UPDATE contacts_fts
+    SET coordonnees = (SELECT group_concat(valeur, ' ') FROM coordonnees WHERE contact_id = new.contact_id)
+    WHERE rowid = new.contact_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS coordonnees_fts_au AFTER UPDATE ON coordonnees BEGIN
+    UPDATE contacts_fts
+    SET coordonnees = (SELECT group_concat(valeur, ' ') FROM coordonnees WHERE contact_id = old.contact_id)
+    WHERE rowid = old.contact_id;
+    UPDATE contacts_fts
+    SET coordonnees = (SELECT group_concat(valeur, ' ') FROM coordonnees WHERE contact_id = new.contact_id)
+    WHERE rowid = new.contact_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS coordonnees_fts_ad AFTER DELETE ON coordonnees BEGIN
+    UPDATE contacts_fts
+    SET coordonnees = (SELECT group_concat(valeur, ' ') FROM coordonnees WHERE contact_id = old.contact_id)
+    WHERE rowid = old.contact_id;
+END;
@@ -0,0 +1,37 @@
+-- Index secondaires pour les requêtes fréquentes
+
+-- Contacts : tri par nom/prénom, filtres et détection des doublons
+CREATE INDEX IF NOT EXISTS idx_contacts_nom_prenom ON contacts (nom, prenom, id);
+CREATE INDEX IF NOT EXISTS idx_contacts_categorie ON contacts (categorie);
+CREATE INDEX IF NOT EXISTS idx_contacts_ville ON contacts (adresse_ville);
+CREATE INDEX IF NOT EXISTS idx_contacts_lower_nom_prenom ON contacts (LOWER(nom), LOWER(prenom));
+
+-- Coordonnées et réseaux sociaux d'un contact
+CREATE INDEX IF NOT EXISTS idx_coordonnees_contact ON coordonnees (contact_id, principal DESC, type_coord);
+CREATE INDEX IF NOT EXISTS idx_reseaux_sociaux_contact ON reseaux_sociaux (contact_id);
+
+-- Interactions : historique d'un contact et historique global
+CREATE INDEX IF NOT EXISTS idx_interactions_contact_date ON interactions (contact_id, date_heure DESC);
+CREATE INDEX IF NOT EXISTS idx_interactions_date ON interactions (date_heure);
+
+-- Pièces jointes
+CREATE INDEX IF NOT EXISTS idx_pieces_jointes_contact ON pieces_jointes (contact_id);
+CREATE INDEX IF NOT EXISTS idx_pieces_jointes_interaction ON pieces_jointes (interaction_id);
+
+-- Rappels : rappels non traités par date, rappels d'un contact
+CREATE INDEX IF NOT EXISTS idx_rappels_traite_date ON rappels (traite, date_heure);
+CREATE INDEX IF NOT EXISTS idx_rappels_contact ON rappels (contact_id);
+
+-- Relations dans les deux sens
+CREATE INDEX IF NOT EXISTS idx_relations_source ON relations (contact_source_id);
+CREATE INDEX IF NOT EXISTS idx_relations_cible ON relations (contact_cible_id);
+
+-- Tags : contacts d'un tag (la clé primaire couvre contact -> tags)
+CREATE INDEX IF NOT EXISTS idx_contact_tags_tag ON contact_tags (tag_id, contact_id);
+
+-- Tâches : tâches d'un projet, par statut, contacts d'une tâche
+CREATE INDEX IF NOT EXISTS idx_taches_projet ON taches (projet_id, date_echeance);
+CREATE INDEX IF NOT EXISTS idx_taches_statut ON taches (statut);
+CREATE INDEX IF NOT EXISTS idx_tache_contacts_contact ON tache_contacts (contact_id, tache_id);
+
+ANALYZE;
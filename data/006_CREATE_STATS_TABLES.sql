@@ -0,0 +1,137 @@
+-- Statistiques matérialisées, tenues à jour par triggers
+-- Le tableau de bord et les statistiques lisent ces tables au lieu de recompter
+
+-- Compteurs globaux
+CREATE TABLE IF NOT EXISTS stats_counters (
+    nom TEXT PRIMARY KEY,
+    valeur INTEGER NOT NULL DEFAULT 0
+);
+
+-- Répartition des contacts par catégorie, ville et pays
+CREATE TABLE IF NOT EXISTS stats_contacts_repartition (
+    dimension TEXT NOT NULL,
+    valeur TEXT NOT NULL,
+    nombre INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, valeur)
+);
+
+-- Nombre de contacts par tag
+CREATE TABLE IF NOT EXISTS stats_tags (
+    tag_id INTEGER PRIMARY KEY,
+    nombre INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
+);
+
+-- Le remplissage initial est fait par DatabaseManager.rebuild_statistics()
+
+-- Contacts : total et répartitions
+CREATE TRIGGER IF NOT EXISTS stats_contacts_ai AFTER INSERT ON contacts BEGIN
+    UPDATE stats_counters SET valeur = valeur + 1 WHERE nom = 'total_contacts';
+    INSERT INTO stats_contacts_repartition (dimension, valeur, nombre)
+    SELECT 'categorie', new.categorie, 1 WHERE new.categorie IS NOT NULL AND new.categorie != ''
+    ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + 1;
+    INSERT INTO stats_contacts_repartition (dimension, valeur, nombre)
+    SELECT 'ville', new.adresse_ville, 1 WHERE new.adresse_ville IS NOT NULL AND new.adresse_ville != ''
+    ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + 1;
+    INSERT INTO stats_contacts_repartition (dimension, valeur, nombre)
+    SELECT 'pays', new.adresse_pays, 1 WHERE new.adresse_pays IS NOT NULL AND new.adresse_pays != ''
+    ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_contacts_ad AFTER DELETE ON contacts BEGIN
+    UPDATE stats_counters SET valeur = valeur - 1 WHERE nom = 'total_contacts';
+    UPDATE stats_contacts_repartition SET nombre = nombre - 1
+    WHERE (dimension = 'categorie' AND valeur = old.categorie)
+       OR (dimension = 'ville' AND valeur = old.adresse_ville)
+       OR (dimension = 'pays' AND valeur = old.adresse_pays);
+    DELETE FROM stats_contacts_repartition WHERE nombre <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_contacts_au
+AFTER UPDATE OF categorie, adresse_ville, adresse_pays ON contacts BEGIN
+    UPDATE stats_contacts_repartition SET nombre = nombre - 1
+    WHERE (dimension = 'categorie' AND valeur = old.categorie)
+       OR (dimension = 'ville' AND valeur = old.adresse_ville)
+       OR (dimension = 'pays' AND valeur = old.adresse_pays);
+    INSERT INTO stats_contacts_repartition (dimension, valeur, nombre)
+    SELECT 'categorie', new.categorie, 1 WHERE new.categorie IS NOT NULL AND new.categorie != ''
+    ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + 1;
+    INSERT INTO stats_contacts_repartition (dimension, valeur, nombre)
+    SELECT 'ville', new.adresse_ville, 1 WHERE new.adresse_ville IS NOT NULL AND new.adresse_ville != ''
+    ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + 1;
+    INSERT INTO stats_contacts_repartition (dimension, valeur, nombre)
+    SELECT 'pays', new.adresse_pays, 1 WHERE new.adresse_pays IS NOT NULL AND new.adresse_pays != ''
+    ON CONFLICT (dimension, valeur) DO UPDATE SET nombre = nombre + 1;
+    DELETE FROM stats_contacts_repartition WHERE nombre <= 0;
+END;
+
+-- Interactions
+CREATE TRIGGER IF NOT EXISTS stats_interactions_ai AFTER INSERT ON interactions BEGIN
+    UPDATE stats_counters SET valeur = valeur + 1 WHERE nom = 'total_interactions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_interactions_ad AFTER DELETE ON interactions BEGIN
+    UPDATE stats_counters SET valeur = valeur - 1 WHERE nom = 'total_interactions';
+END;
+
+-- Rappels actifs (non traités)
+CREATE TRIGGER IF NOT EXISTS stats_rappels_ai AFTER INSERT ON rappels WHEN new.traite = 0 BEGIN
+    UPDATE stats_counters SET valeur = valeur + 1 WHERE nom = 'rappels_actifs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_rappels_ad AFTER DELETE ON rappels WHEN old.traite = 0 BEGIN
+    UPDATE stats_counters SET valeur = valeur - 1 WHERE nom = 'rappels_actifs';
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_rappels_au AFTER UPDATE OF traite ON rappels BEGIN
+    UPDATE stats_counters
+    SET valeur = valeur + (new.traite = 0) - (old.traite = 0)
+    WHERE nom = 'rappels_actifs';
+END;
+
+-- Tâches : total et en cours
+CREATE TRIGGER IF NOT EXISTS stats_taches_ai AFTER INSERT ON taches BEGIN
+    UPDATE stats_counters SET valeur = valeur + 1 WHERE nom = 'total_taches';
+    UPDATE stats_counters SET valeur = valeur + 1
+    WHERE nom = 'taches_en_cours' AND new.statut = 'En cours';
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_taches_ad AFTER DELETE ON taches BEGIN
+    UPDATE stats_counters SET valeur = valeur - 1 WHERE nom = 'total_taches';
+    UPDATE stats_counters SET valeur = valeur - 1
+    WHERE nom = 'taches_en_cours' AND old.statut = 'En cours';
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_taches_au AFTER UPDATE OF statut ON taches BEGIN
+    UPDATE stats_counters
+    SET valeur = valeur + (new.statut IS 'En cours') - (old.statut IS 'En cours')
+    WHERE nom = 'taches_en_cours';
+END;
+
+-- Tags et projets
+CREATE TRIGGER IF NOT EXISTS stats_tags_ai AFTER INSERT ON tags BEGIN
+    UPDATE stats_counters SET valeur = valeur + 1 WHERE nom = 'total_tags';
+    INSERT OR IGNORE INTO stats_tags (tag_id, nombre) VALUES (new.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_tags_ad AFTER DELETE ON tags BEGIN
+    UPDATE stats_counters SET valeur = valeur - 1 WHERE nom = 'total_tags';
+    DELETE FROM stats_tags WHERE tag_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_projets_ai AFTER INSERT ON projets BEGIN
+    UPDATE stats_counters SET valeur = valeur + 1 WHERE nom = 'total_projets';
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_projets_ad AFTER DELETE ON projets BEGIN
+    UPDATE stats_counters SET valeur = valeur - 1 WHERE nom = 'total_projets';
+END;
+
+-- Contacts par tag
+CREATE TRIGGER IF NOT EXISTS stats_contact_tags_ai AFTER INSERT ON contact_tags BEGIN
+    UPDATE stats_tags SET nombre = nombre + 1 WHERE tag_id = new.tag_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS stats_contact_tags_ad AFTER DELETE ON contact_tags BEGIN
+    UPDATE stats_tags SET nombre = nombre - 1 WHERE tag_id = old.tag_id;
+END;
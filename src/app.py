@@ -7,6 +7,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from utils.database_manager import DatabaseManager
 from utils.auth_manager import AuthManager
+from utils.background_executor import BackgroundExecutor, LoadingIndicator
 from utils.ui_config import configure_styles, load_theme_preference, get_current_theme, set_theme, apply_theme, COLORS
 from modules.contact_manager import ContactManager
 from modules.contact_ui import ContactUI
@@ -130,14 +131,17 @@ class MainApplication:
         self.import_export_mgr = ImportExportManager(self.db, self.auth, self.contact_mgr)
         self.stats_mgr = StatisticsManager(self.db)
         
-        self.dashboard_ui = DashboardUI(self.root, self.stats_mgr, self.rappel_mgr)
-        self.interaction_ui = InteractionUI(self.root, self.interaction_mgr, self.contact_mgr)
+        # Requêtes des onglets exécutées en arrière-plan (indicateur dans l'en-tête)
+        self.executor = BackgroundExecutor(self.root)
+        
+        self.dashboard_ui = DashboardUI(self.root, self.stats_mgr, self.rappel_mgr, self.executor)
+        self.interaction_ui = InteractionUI(self.root, self.interaction_mgr, self.contact_mgr, self.executor)
         self.rappel_ui = RappelUI(self.root, self.rappel_mgr, self.contact_mgr)
-        self.task_ui = TaskUI(self.root, self.task_mgr, self.contact_mgr)
+        self.task_ui = TaskUI(self.root, self.task_mgr, self.contact_mgr, self.executor)
         self.tag_relation_ui = TagRelationUI(self.root, self.tag_mgr, self.relation_mgr, self.contact_mgr)
-        self.projet_ui = ProjetUI(self.root, self.projet_mgr, self.task_mgr, self.contact_mgr)
-        self.import_export_ui = ImportExportUI(self.root, self.import_export_mgr, self.db)
-        self.statistics_ui = StatisticsUI(self.root, self.stats_mgr)
+        self.projet_ui = ProjetUI(self.root, self.projet_mgr, self.task_mgr, self.contact_mgr, self.executor)
+        self.import_export_ui = ImportExportUI(self.root, self.import_export_mgr, self.db, self.executor)
+        self.statistics_ui = StatisticsUI(self.root, self.stats_mgr, self.executor)
         
         self.create_main_interface()
         
@@ -153,6 +157,13 @@ class MainApplication:
         file_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Fichier", menu=file_menu)
         file_menu.add_command(label="Sauvegarder la base", command=self.import_export_ui.backup_database)
+        
+        storage_menu = tk.Menu(file_menu, tearoff=0)
+        file_menu.add_cascade(label="Profil de stockage", menu=storage_menu)
+        self.storage_profile_var = tk.StringVar(value=self.db.storage_profile)
+        storage_menu.add_radiobutton(label="Sûr (durable)", variable=self.storage_profile_var, value="durable", command=self.change_storage_profile)
+        storage_menu.add_radiobutton(label="Équilibré (balanced)", variable=self.storage_profile_var, value="balanced", command=self.change_storage_profile)
+        storage_menu.add_radiobutton(label="Rapide (bulk)", variable=self.storage_profile_var, value="bulk", command=self.change_storage_profile)
         file_menu.add_separator()
         file_menu.add_command(label="Déconnexion", command=self.logout)
         file_menu.add_command(label="Quitter", command=self.root.quit)
@@ -162,6 +173,8 @@ class MainApplication:
         import_menu.add_command(label="Importer CSV", command=self.import_export_ui.import_csv)
         import_menu.add_command(label="Exporter CSV", command=self.import_export_ui.export_csv)
         import_menu.add_command(label="Exporter vCard", command=self.import_export_ui.export_vcard)
+        import_menu.add_command(label="Exporter vCard 4.0", command=lambda: self.import_export_ui.export_vcard('4.0'))
+        import_menu.add_command(label="Export complet (CSV, vCard, JSON)", command=self.import_export_ui.export_all)
         import_menu.add_separator()
         import_menu.add_command(label="Détecter les doublons", command=self.import_export_ui.detect_duplicates)
         
@@ -197,6 +210,10 @@ class MainApplication:
         user_info = f"Connecté: {self.current_user['prenom']} {self.current_user['nom']} | Rôle: {self.current_user['role']}"
         ttk.Label(header, text=user_info, font=("", 11, "bold")).pack(side=tk.LEFT, padx=10, pady=8)
         
+        self.loading_indicator = LoadingIndicator(header)
+        self.loading_indicator.pack(side=tk.RIGHT, padx=10)
+        self.executor.indicator = self.loading_indicator
+        
         # Notebook principal avec meilleure mise en page
         self.notebook = ttk.Notebook(main_container)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -205,7 +222,7 @@ class MainApplication:
         
         contact_tab = ttk.Frame(self.notebook)
         self.notebook.add(contact_tab, text="Contacts")
-        contact_ui = ContactUI(self.root, self.contact_mgr, self.auth, self.notebook)
+        contact_ui = ContactUI(self.root, self.contact_mgr, self.auth, self.notebook, self.executor, self.tag_mgr)
         contact_ui.create_main_interface(contact_tab)
         
         self.interaction_ui.create_interactions_tab(self.notebook)
@@ -219,9 +236,16 @@ class MainApplication:
         if set_theme(self.db, theme):
             apply_theme(self.root)
     
+    def change_storage_profile(self):
+        profile = self.storage_profile_var.get()
+        if not self.db.set_storage_profile(profile):
+            messagebox.showerror("Erreur", "Impossible d'appliquer le profil de stockage")
+            self.storage_profile_var.set(self.db.storage_profile)
+    
     def logout(self):
         if messagebox.askyesno("Déconnexion", "Voulez-vous vraiment vous déconnecter ?"):
             self.auth.logout()
+            self.executor.shutdown()
             
             for widget in self.root.winfo_children():
                 widget.destroy()
@@ -242,6 +266,10 @@ def main():
     root = tk.Tk()
     app = MainApplication(root)
     root.mainloop()
+    # Attend les requêtes en cours, écrit les logs encore en attente et ferme les connexions
+    if getattr(app, 'executor', None):
+        app.executor.shutdown()
+    app.db.close()
 
 
 if __name__ == "__main__":
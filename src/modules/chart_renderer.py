@@ -0,0 +1,103 @@
+"""Rendu des graphiques de statistiques dans des processus séparés
+
+Chaque fonction de rendu est exécutée dans un processus de travail : elle reçoit
+des données déjà calculées (listes simples, sérialisables) et écrit un fichier PNG.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Nombre maximal de processus de rendu (un graphique par processus)
+MAX_CHART_WORKERS = 4
+
+
+def _pyplot():
+    import matplotlib
+    matplotlib.use('Agg')  # Backend non-interactif
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def render_pie(file_path, title, labels, values):
+    """Camembert"""
+    plt = _pyplot()
+    plt.figure(figsize=(10, 6))
+    plt.pie(values, labels=labels, autopct='%1.1f%%', startangle=90)
+    plt.title(title)
+    plt.axis('equal')
+    plt.savefig(file_path)
+    plt.close()
+    return file_path
+
+
+def render_bar(file_path, title, labels, values, xlabel, ylabel):
+    """Barres verticales"""
+    plt = _pyplot()
+    plt.figure(figsize=(12, 6))
+    plt.bar(labels, values)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(file_path)
+    plt.close()
+    return file_path
+
+
+def render_line(file_path, title, labels, values, xlabel, ylabel):
+    """Courbe avec marqueurs"""
+    plt = _pyplot()
+    plt.figure(figsize=(12, 6))
+    plt.plot(labels, values, marker='o')
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.title(title)
+    plt.xticks(rotation=45, ha='right')
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(file_path)
+    plt.close()
+    return file_path
+
+
+def render_barh(file_path, title, labels, values, xlabel):
+    """Barres horizontales"""
+    plt = _pyplot()
+    plt.figure(figsize=(12, 6))
+    plt.barh(labels, values)
+    plt.xlabel(xlabel)
+    plt.title(title)
+    plt.tight_layout()
+    plt.savefig(file_path)
+    plt.close()
+    return file_path
+
+
+def submit_charts(charts, output_dir, max_workers=MAX_CHART_WORKERS):
+    """Lance le rendu de chaque graphique dans un processus de travail
+    
+    charts : liste de (nom_fichier, fonction_de_rendu, kwargs)
+    Retourne {nom_fichier: future} ; chaque future donne le chemin du fichier écrit.
+    Le pool est libéré dès que tous les rendus sont terminés.
+    """
+    if not charts:
+        return {}
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # spawn : pas de fork d'un processus qui exécute Tk et des connexions SQLite
+    pool = ProcessPoolExecutor(
+        max_workers=min(max_workers, len(charts)),
+        mp_context=multiprocessing.get_context('spawn')
+    )
+    try:
+        futures = {
+            file_name: pool.submit(renderer, os.path.join(output_dir, file_name), **kwargs)
+            for file_name, renderer, kwargs in charts
+        }
+    finally:
+        pool.shutdown(wait=False)
+    
+    return futures
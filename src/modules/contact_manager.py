@@ -3,14 +3,32 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 import os
+import re
+import json
+import base64
 
 
 class ContactManager:
     """Gère toutes les opérations sur les contacts"""
     
+    # Nombre d'IDs par clause IN (reste sous la limite de variables SQLite)
+    BULK_CHUNK_SIZE = 500
+    
+    # Taille de page par défaut de la pagination par clé
+    PAGE_SIZE = 200
+    
+    # Filtres à valeurs distinctes (facettes) : nom du filtre -> colonne de contacts
+    FACET_COLUMNS = {
+        'categorie': 'categorie',
+        'ville': 'adresse_ville',
+        'societe': 'societe',
+    }
+    
     def __init__(self, db_manager, auth_manager):
         self.db = db_manager
         self.auth = auth_manager
+        self._facet_cache = {}
+        self._facet_generation = 0
     
     def create_contact(self, contact_data):
         """Crée un nouveau contact"""
@@ -42,9 +60,13 @@ class ContactManager:
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             )
             
-            contact_id = self.db.execute_insert(query, params)
-            
-            if contact_id:
+            # Contact, coordonnées, réseaux sociaux et log : une seule transaction
+            with self.db.transaction():
+                contact_id = self.db.execute_insert(query, params)
+                
+                if not contact_id:
+                    return False, None
+                
                 # Ajouter les coordonnées (téléphones, emails)
                 if 'coordonnees' in contact_data:
                     for coord in contact_data['coordonnees']:
@@ -63,10 +85,10 @@ class ContactManager:
                     contact_id,
                     f"{contact_data.get('prenom', '')} {contact_data.get('nom', '')}"
                 )
-                
-                return True, contact_id
             
-            return False, None
+            # Listes de filtres (catégories, villes, sociétés) à recalculer
+            self.invalidate_facets()
+            return True, contact_id
         except Exception as e:
             print(f"Erreur création contact: {e}")
             return False, None
@@ -102,16 +124,19 @@ class ContactManager:
                 contact_id
             )
             
-            success = self.db.execute_update(query, params)
+            with self.db.transaction():
+                success = self.db.execute_update(query, params)
+                
+                if success:
+                    self.db.log_action(
+                        self.auth.current_user['id'],
+                        "Modification contact",
+                        "contacts",
+                        contact_id
+                    )
             
             if success:
-                self.db.log_action(
-                    self.auth.current_user['id'],
-                    "Modification contact",
-                    "contacts",
-                    contact_id
-                )
-            
+                self.invalidate_facets()
             return success
         except Exception as e:
             print(f"Erreur mise à jour contact: {e}")
@@ -127,6 +152,7 @@ class ContactManager:
             success = self.db.execute_delete("DELETE FROM contacts WHERE id = ?", (contact_id,))
             
             if success:
+                self.invalidate_facets()
                 self.db.log_action(
                     self.auth.current_user['id'],
                     "Suppression contact",
@@ -161,46 +187,306 @@ class ContactManager:
         
         return None
     
+    def get_contacts_bulk(self, contact_ids):
+        """Récupère plusieurs contacts complets avec un nombre fixe de requêtes par lot
+        
+        Retourne une liste de dictionnaires au même format que get_contact,
+        dans l'ordre des IDs fournis (les IDs inexistants sont ignorés).
+        """
+        ids = list(dict.fromkeys(contact_ids or []))
+        contacts = {}
+        
+        for start in range(0, len(ids), self.BULK_CHUNK_SIZE):
+            chunk = ids[start:start + self.BULK_CHUNK_SIZE]
+            placeholders = ','.join(['?' for _ in chunk])
+            
+            rows = self.db.execute_query(f"SELECT * FROM contacts WHERE id IN ({placeholders})", chunk)
+            for row in rows or []:
+                contacts[row['id']] = row
+            
+            related = self.get_related_bulk(chunk)
+            for contact_id, data in related.items():
+                if contact_id in contacts:
+                    contacts[contact_id].update(data)
+        
+        return [contacts[cid] for cid in ids if cid in contacts]
+    
+    def get_related_bulk(self, contact_ids):
+        """Coordonnées, réseaux sociaux et tags de plusieurs contacts, 3 requêtes par lot
+        
+        Retourne {contact_id: {'coordonnees': [...], 'reseaux_sociaux': [...], 'tags': [...]}}
+        avec une entrée (éventuellement vide) pour chaque ID fourni.
+        """
+        ids = list(dict.fromkeys(contact_ids or []))
+        related = {
+            contact_id: {'coordonnees': [], 'reseaux_sociaux': [], 'tags': []}
+            for contact_id in ids
+        }
+        
+        for start in range(0, len(ids), self.BULK_CHUNK_SIZE):
+            chunk = ids[start:start + self.BULK_CHUNK_SIZE]
+            placeholders = ','.join(['?' for _ in chunk])
+            
+            coordonnees = self.db.execute_query(f"""
+                SELECT * FROM coordonnees
+                WHERE contact_id IN ({placeholders})
+                ORDER BY contact_id, principal DESC, type_coord
+            """, chunk)
+            for coord in coordonnees or []:
+                related[coord['contact_id']]['coordonnees'].append(coord)
+            
+            reseaux = self.db.execute_query(
+                f"SELECT * FROM reseaux_sociaux WHERE contact_id IN ({placeholders}) ORDER BY contact_id, id",
+                chunk
+            )
+            for reseau in reseaux or []:
+                related[reseau['contact_id']]['reseaux_sociaux'].append(reseau)
+            
+            tags = self.db.execute_query(f"""
+                SELECT ct.contact_id, t.id, t.nom_tag
+                FROM tags t
+                JOIN contact_tags ct ON t.id = ct.tag_id
+                WHERE ct.contact_id IN ({placeholders})
+            """, chunk)
+            for tag in tags or []:
+                related[tag.pop('contact_id')]['tags'].append(tag)
+        
+        return related
+    
     def search_contacts(self, filters=None):
         """Recherche des contacts avec filtres"""
-        query = "SELECT * FROM contacts WHERE 1=1"
+        conditions, params = self._build_filter_conditions(filters)
+        query = "SELECT * FROM contacts WHERE " + " AND ".join(["1=1"] + conditions)
+        query += " ORDER BY nom, prenom"
+        
+        return self.db.execute_query(query, params if params else None)
+    
+    def _build_filter_conditions(self, filters):
+        """Conditions WHERE (et leurs paramètres) correspondant aux filtres de recherche"""
+        conditions = []
         params = []
         
         if filters:
             if filters.get('search_text'):
-                query += """ AND (
+                conditions.append("""(
                     nom LIKE ? OR prenom LIKE ? OR societe LIKE ? OR 
                     adresse_ville LIKE ? OR poste LIKE ?
-                )"""
+                )""")
                 search_term = f"%{filters['search_text']}%"
                 params.extend([search_term] * 5)
             
             if filters.get('categorie'):
-                query += " AND categorie = ?"
+                conditions.append("categorie = ?")
                 params.append(filters['categorie'])
             
             if filters.get('ville'):
-                query += " AND adresse_ville = ?"
+                conditions.append("adresse_ville = ?")
                 params.append(filters['ville'])
             
             if filters.get('societe'):
-                query += " AND societe = ?"
+                conditions.append("societe = ?")
                 params.append(filters['societe'])
         
-        query += " ORDER BY nom, prenom"
+        return conditions, params
+    
+    def search_contacts_fulltext(self, search_text, filters=None, limit=None):
+        """Recherche plein texte classée par pertinence (index FTS5)
         
-        return self.db.execute_query(query, params if params else None)
+        Chaque mot saisi est recherché par préfixe, sans tenir compte des accents,
+        dans le nom, le prénom, la société, le poste, la ville, les coordonnées et les notes.
+        Retombe sur search_contacts (LIKE) si l'index n'est pas disponible.
+        """
+        match_query = self._build_fts_query(search_text)
+        
+        if not self.db.fts_enabled or not match_query:
+            fallback_filters = dict(filters or {})
+            fallback_filters['search_text'] = search_text
+            return self.search_contacts(fallback_filters)
+        
+        # Poids bm25 par colonne : nom, prenom, societe, poste, ville, coordonnees, notes
+        query = """
+            SELECT c.*, bm25(contacts_fts, 10.0, 8.0, 4.0, 2.0, 2.0, 1.0, 0.5) as score
+            FROM contacts_fts
+            JOIN contacts c ON c.id = contacts_fts.rowid
+            WHERE contacts_fts MATCH ?
+        """
+        params = [match_query]
+        
+        if filters:
+            if filters.get('categorie'):
+                query += " AND c.categorie = ?"
+                params.append(filters['categorie'])
+            
+            if filters.get('ville'):
+                query += " AND c.adresse_ville = ?"
+                params.append(filters['ville'])
+            
+            if filters.get('societe'):
+                query += " AND c.societe = ?"
+                params.append(filters['societe'])
+        
+        query += " ORDER BY score, c.nom, c.prenom"
+        
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        return self.db.execute_query(query, params)
+    
+    def get_matching_ids_query(self, filters=None):
+        """Sous-requête SQL (et paramètres) des IDs des contacts correspondant à une recherche
+        
+        Même sélection que search_contacts_fulltext / search_contacts : permet des
+        opérations ensemblistes (INSERT ... SELECT) sans charger les IDs en Python.
+        """
+        filters = dict(filters or {})
+        search_text = filters.pop('search_text', None)
+        match_query = self._build_fts_query(search_text) if search_text else ''
+        
+        if search_text and not (self.db.fts_enabled and match_query):
+            # Même repli que la recherche plein texte : LIKE sur le texte saisi
+            filters['search_text'] = search_text
+        
+        conditions, params = self._build_filter_conditions(filters)
+        
+        if search_text and self.db.fts_enabled and match_query:
+            conditions.insert(0, "id IN (SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH ?)")
+            params.insert(0, match_query)
+        
+        query = "SELECT id FROM contacts WHERE " + " AND ".join(["1=1"] + conditions)
+        return query, params
     
-    def get_all_contacts(self, limit=None, offset=None):
-        """Récupère tous les contacts avec pagination optionnelle"""
-        query = "SELECT * FROM contacts ORDER BY nom, prenom"
+    def _build_fts_query(self, search_text):
+        """Transforme la saisie utilisateur en requête FTS5 (préfixes combinés en ET)"""
+        terms = re.findall(r"\w+", search_text or '', re.UNICODE)
+        return " ".join(f'"{term}"*' for term in terms)
+    
+    def get_all_contacts(self, limit=None, offset=None, page_token=None):
+        """Récupère tous les contacts avec pagination optionnelle
+        
+        Args:
+            limit: Nombre maximal de contacts
+            offset: Décalage (coût proportionnel au décalage, préférer page_token)
+            page_token: Jeton de continuation (voir make_page_token) : reprend après ce contact
+        """
+        query = "SELECT * FROM contacts"
+        params = []
+        
+        if page_token:
+            condition, params = self._build_keyset_condition(self.decode_page_token(page_token))
+            query += " WHERE " + condition
+        
+        # L'id départage les homonymes : ordre stable d'une page à l'autre
+        query += " ORDER BY nom, prenom, id"
         
         if limit:
-            query += f" LIMIT {limit}"
+            query += " LIMIT ?"
+            params.append(limit)
             if offset:
-                query += f" OFFSET {offset}"
+                query += " OFFSET ?"
+                params.append(offset)
+        
+        return self.db.execute_records(query, params if params else None)
+    
+    def get_contacts_page(self, filters=None, page_token=None, limit=PAGE_SIZE):
+        """Récupère une page de contacts triés par nom, prénom, id (pagination par clé)
+        
+        Chaque page reprend après la clé du dernier contact de la précédente : le coût
+        ne dépend pas de la profondeur et un contact inséré entre deux appels ne décale
+        pas les pages suivantes (ni doublon, ni contact sauté).
+        
+        Args:
+            filters: Filtres de search_contacts (catégorie, ville, société, texte)
+            page_token: Jeton renvoyé par l'appel précédent (None pour la première page)
+            limit: Nombre maximal de contacts de la page
+        
+        Returns:
+            (contacts, jeton de la page suivante) ; le jeton vaut None s'il n'y a plus de page
+        """
+        conditions, params = self._build_filter_conditions(filters)
         
-        return self.db.execute_query(query)
+        if page_token:
+            condition, key_params = self._build_keyset_condition(self.decode_page_token(page_token))
+            conditions.append(condition)
+            params.extend(key_params)
+        
+        query = "SELECT * FROM contacts"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        # Une ligne de plus que la page pour savoir s'il en reste
+        query += " ORDER BY nom, prenom, id LIMIT ?"
+        params.append(limit + 1)
+        
+        contacts = self.db.execute_records(query, params) or []
+        
+        if len(contacts) <= limit:
+            return contacts, None
+        
+        contacts = contacts[:limit]
+        return contacts, self.make_page_token(contacts[-1])
+    
+    def iter_contacts(self, filters=None, page_size=PAGE_SIZE):
+        """Parcourt les contacts page par page sans tous les charger en mémoire"""
+        page_token = None
+        while True:
+            contacts, page_token = self.get_contacts_page(filters, page_token, page_size)
+            yield from contacts
+            if page_token is None:
+                return
+    
+    def stream_contacts(self, filters=None, columns='*'):
+        """Contacts filtrés triés par nom, prénom, id, lus en flux (une seule requête)
+        
+        À consommer entièrement sans écrire en base pendant le parcours (voir iter_query).
+        """
+        conditions, params = self._build_filter_conditions(filters)
+        
+        query = f"SELECT {columns} FROM contacts"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY nom, prenom, id"
+        
+        return self.db.iter_query(query, params)
+    
+    def make_page_token(self, contact):
+        """Jeton de continuation opaque : reprise après ce contact dans l'ordre nom, prénom, id"""
+        key = json.dumps([contact['nom'], contact['prenom'], contact['id']], ensure_ascii=False)
+        return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+    
+    def decode_page_token(self, page_token):
+        """Clé (nom, prenom, id) d'un jeton de continuation, ValueError s'il est invalide"""
+        try:
+            nom, prenom, contact_id = json.loads(base64.urlsafe_b64decode(page_token.encode('ascii')))
+            return nom, prenom, int(contact_id)
+        except (ValueError, TypeError, UnicodeError) as e:
+            raise ValueError(f"Jeton de pagination invalide: {page_token}") from e
+    
+    def _build_keyset_condition(self, key):
+        """Condition « après la clé (nom, prenom, id) » dans l'ordre ORDER BY nom, prenom, id"""
+        nom, prenom, contact_id = key
+        
+        if prenom is None:
+            # Les prénoms NULL sont triés en premier : suivent les autres NULL d'id supérieur
+            # puis tous les prénoms renseignés du même nom
+            return (
+                "(nom > ? OR (nom = ? AND (prenom IS NOT NULL OR id > ?)))",
+                [nom, nom, contact_id]
+            )
+        
+        # Comparaison de valeurs de ligne : parcours de l'index (nom, prenom, id)
+        return "(nom, prenom, id) > (?, ?, ?)", [nom, prenom, contact_id]
+    
+    def count_contacts(self, filters=None):
+        """Nombre de contacts correspondant aux filtres"""
+        conditions, params = self._build_filter_conditions(filters)
+        
+        query = "SELECT COUNT(*) as total FROM contacts"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        
+        result = self.db.execute_query(query, params if params else None)
+        return result[0]['total'] if result else 0
     
     def add_coordonnee(self, contact_id, type_coord, valeur, principal=0):
         """Ajoute une coordonnée (téléphone, email) à un contact"""
@@ -256,21 +542,52 @@ class ContactManager:
     
     def get_categories(self):
         """Récupère toutes les catégories distinctes"""
-        query = "SELECT DISTINCT categorie FROM contacts WHERE categorie IS NOT NULL AND categorie != '' ORDER BY categorie"
-        result = self.db.execute_query(query)
-        return [row['categorie'] for row in result] if result else []
+        return list(self.get_facet_counts('categorie'))
     
     def get_villes(self):
         """Récupère toutes les villes distinctes"""
-        query = "SELECT DISTINCT adresse_ville FROM contacts WHERE adresse_ville IS NOT NULL AND adresse_ville != '' ORDER BY adresse_ville"
-        result = self.db.execute_query(query)
-        return [row['adresse_ville'] for row in result] if result else []
+        return list(self.get_facet_counts('ville'))
     
     def get_societes(self):
         """Récupère toutes les sociétés distinctes"""
-        query = "SELECT DISTINCT societe FROM contacts WHERE societe IS NOT NULL AND societe != '' ORDER BY societe"
+        return list(self.get_facet_counts('societe'))
+    
+    def get_facet_counts(self, facet):
+        """Valeurs distinctes d'un filtre ('categorie', 'ville', 'societe') avec leur nombre de contacts
+        
+        Returns:
+            Dictionnaire {valeur: nombre de contacts} trié par valeur, mis en cache
+            jusqu'à la prochaine écriture sur les contacts
+        """
+        cached = self._facet_cache.get(facet)
+        if cached is not None:
+            return cached
+        
+        generation = self._facet_generation
+        column = self.FACET_COLUMNS[facet]
+        query = f"""
+            SELECT {column} as valeur, COUNT(*) as total
+            FROM contacts
+            WHERE {column} IS NOT NULL AND {column} != ''
+            GROUP BY {column}
+            ORDER BY {column}
+        """
         result = self.db.execute_query(query)
-        return [row['societe'] for row in result] if result else []
+        
+        if result is None:
+            return {}
+        
+        counts = {row['valeur']: row['total'] for row in result}
+        
+        # Une écriture survenue pendant le calcul rend le résultat périmé
+        if generation == self._facet_generation:
+            self._facet_cache[facet] = counts
+        return counts
+    
+    def invalidate_facets(self):
+        """Vide le cache des listes de filtres (après une écriture sur les contacts)"""
+        self._facet_generation += 1
+        self._facet_cache = {}
     
     def add_note(self, contact_id, contenu):
         """Ajoute une note à un contact (stockée dans la table contact avec le champ notes)"""
@@ -4,18 +4,36 @@ from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 import webbrowser
 
+from utils.background_executor import BackgroundExecutor
+
+
+# Liste virtuelle : contacts chargés par page, la suivante dès que la fin approche
+CONTACTS_PAGE_SIZE = 200
+CONTACTS_PREFETCH_THRESHOLD = 0.8
+
+# Délai (ms) après la dernière frappe avant de lancer la recherche
+SEARCH_DELAY = 300
 
 
 class ContactUI:
     
     
-    def __init__(self, parent, contact_manager, auth_manager, notebook=None):
+    def __init__(self, parent, contact_manager, auth_manager, notebook=None, executor=None, tag_manager=None):
         self.parent = parent
         self.contact_mgr = contact_manager
         self.auth = auth_manager
+        self.tag_mgr = tag_manager
         self.notebook = notebook
+        self.executor = executor or BackgroundExecutor(parent)
+        self.search_after_id = None
         self.tab = None
         self.current_contact_id = None
+        self.facet_values = {'categorie': {}, 'ville': {}}
+        
+        # État de la pagination de la liste (filtres courants, jeton de la page suivante)
+        self.page_filters = None
+        self.next_page_token = None
+        self.page_load_scheduled = False
         
     def create_main_interface(self, container):
         
@@ -31,6 +49,7 @@ class ContactUI:
         self.search_var = tk.StringVar()
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=40)
         search_entry.grid(row=0, column=1, padx=5, sticky=(tk.W, tk.E))
+        search_entry.bind("<KeyRelease>", self._on_search_key)
         
         ttk.Button(search_frame, text="Rechercher", command=self.search_contacts, style="Accent.TButton").grid(row=0, column=2, padx=5)
         ttk.Button(search_frame, text="Réinitialiser", command=self.reset_search).grid(row=0, column=3, padx=5)
@@ -56,6 +75,11 @@ class ContactUI:
         ttk.Button(button_frame, text="Voir détails", command=self.view_contact_details).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Modifier", command=self.edit_contact).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Supprimer", command=self.delete_contact, style="Danger.TButton").pack(side=tk.LEFT, padx=5)
+        if self.tag_mgr:
+            ttk.Button(button_frame, text="Taguer les résultats", command=self.tag_search_results).pack(side=tk.LEFT, padx=5)
+        
+        self.count_var = tk.StringVar()
+        ttk.Label(button_frame, textvariable=self.count_var).pack(side=tk.RIGHT, padx=5)
         
         
         list_frame = ttk.Frame(main_frame)
@@ -70,9 +94,10 @@ class ContactUI:
             list_frame,
             columns=("id", "nom", "prenom", "societe", "poste", "ville", "categorie"),
             show="headings",
-            yscrollcommand=vsb.set,
+            yscrollcommand=self._on_contacts_scroll,
             xscrollcommand=hsb.set
         )
+        self.contacts_vsb = vsb
         
         vsb.config(command=self.contacts_tree.yview)
         hsb.config(command=self.contacts_tree.xview)
@@ -121,35 +146,108 @@ class ContactUI:
         if self.notebook and self.tab and self.notebook.select() == str(self.tab):
             self.load_contacts()
             self.load_filter_options()
+        else:
+            # Onglet quitté : inutile de terminer le chargement de la liste
+            self.executor.cancel('contacts')
+            # Une page suivante annulée doit pouvoir être redemandée au défilement
+            self.page_load_scheduled = False
     
     def load_contacts(self, filters=None):
-        for item in self.contacts_tree.get_children():
-            self.contacts_tree.delete(item)
+        # La liste actuelle reste affichée jusqu'à l'arrivée des nouveaux résultats
+        self.next_page_token = None
+        self.page_load_scheduled = False
+        self.executor.submit('contacts', self._fetch_contacts, filters, on_done=self._show_contacts)
+    
+    def _fetch_contacts(self, filters):
+        # Exécuté en arrière-plan : (filtres, contacts, jeton de page suivante, total)
+        if filters and filters.get('search_text'):
+            # Résultats classés par pertinence : affichés en une fois
+            contacts = self.contact_mgr.search_contacts_fulltext(filters['search_text'], filters) or []
+            return filters, contacts, None, len(contacts)
+        
+        # Liste virtuelle : seule la première page est chargée, les suivantes au défilement
+        filters = filters or {}
+        contacts, page_token = self.contact_mgr.get_contacts_page(filters, limit=CONTACTS_PAGE_SIZE)
+        return filters, contacts, page_token, self.contact_mgr.count_contacts(filters)
+    
+    def _show_contacts(self, result):
+        self.page_filters, contacts, self.next_page_token, total = result
+        self.contacts_tree.delete(*self.contacts_tree.get_children())
+        self.count_var.set(f"{total} contact(s)")
+        self.insert_contact_rows(contacts)
+    
+    def load_next_page(self):
+        if self.next_page_token is None:
+            self.page_load_scheduled = False
+            return
         
-        if filters:
-            contacts = self.contact_mgr.search_contacts(filters)
-        else:
-            contacts = self.contact_mgr.get_all_contacts()
-        
-        if contacts:
-            for contact in contacts:
-                self.contacts_tree.insert("", "end", values=(
-                    contact['id'],
-                    contact['nom'] or '',
-                    contact['prenom'] or '',
-                    contact['societe'] or '',
-                    contact['poste'] or '',
-                    contact['adresse_ville'] or '',
-                    contact['categorie'] or ''
-                ))
+        self.executor.submit(
+            'contacts', self.contact_mgr.get_contacts_page, self.page_filters,
+            page_token=self.next_page_token, limit=CONTACTS_PAGE_SIZE,
+            on_done=self._append_contacts_page, on_error=self._on_contacts_page_error
+        )
+    
+    def _append_contacts_page(self, result):
+        contacts, self.next_page_token = result
+        self.page_load_scheduled = False
+        self.insert_contact_rows(contacts)
+    
+    def _on_contacts_page_error(self, error):
+        self.page_load_scheduled = False
+        print(f"Erreur lors du chargement de la page suivante: {error}")
+    
+    def _on_contacts_scroll(self, first, last):
+        self.contacts_vsb.set(first, last)
+        
+        # Fin de la liste bientôt visible : charger la page suivante
+        if (self.next_page_token is not None and not self.page_load_scheduled
+                and float(last) >= CONTACTS_PREFETCH_THRESHOLD):
+            self.page_load_scheduled = True
+            self.load_next_page()
+    
+    def _on_search_key(self, event):
+        # Recherche pendant la saisie : relancée après une courte pause de frappe
+        if self.search_after_id:
+            self.contacts_tree.after_cancel(self.search_after_id)
+        self.search_after_id = self.contacts_tree.after(SEARCH_DELAY, self._search_after_typing)
+    
+    def _search_after_typing(self):
+        self.search_after_id = None
+        self.search_contacts()
+    
+    def insert_contact_rows(self, contacts):
+        for contact in contacts:
+            self.contacts_tree.insert("", "end", values=(
+                contact['id'],
+                contact['nom'] or '',
+                contact['prenom'] or '',
+                contact['societe'] or '',
+                contact['poste'] or '',
+                contact['adresse_ville'] or '',
+                contact['categorie'] or ''
+            ))
     
     def load_filter_options(self):
         
-        categories = [''] + self.contact_mgr.get_categories()
-        self.categorie_combo['values'] = categories
-        
-        villes = [''] + self.contact_mgr.get_villes()
-        self.ville_combo['values'] = villes
+        # Listes en cache côté manager, affichées avec le nombre de contacts
+        facets = (
+            ('categorie', self.categorie_combo, self.categorie_var),
+            ('ville', self.ville_combo, self.ville_var),
+        )
+        for facet, combo, var in facets:
+            selected = self.get_facet_selection(facet, var)
+            counts = self.contact_mgr.get_facet_counts(facet)
+            self.facet_values[facet] = {f"{value} ({count})": value for value, count in counts.items()}
+            combo['values'] = [''] + list(self.facet_values[facet])
+            
+            # Les nombres ont pu changer : resélectionner la valeur sous son nouveau libellé
+            if selected:
+                var.set(f"{selected} ({counts[selected]})" if selected in counts else '')
+    
+    def get_facet_selection(self, facet, var):
+        """Valeur brute sélectionnée dans une liste de filtre (sans le nombre de contacts)"""
+        label = var.get()
+        return self.facet_values.get(facet, {}).get(label, label)
     
     def search_contacts(self):
         
@@ -159,10 +257,10 @@ class ContactUI:
             filters['search_text'] = self.search_var.get()
         
         if self.categorie_var.get():
-            filters['categorie'] = self.categorie_var.get()
+            filters['categorie'] = self.get_facet_selection('categorie', self.categorie_var)
         
         if self.ville_var.get():
-            filters['ville'] = self.ville_var.get()
+            filters['ville'] = self.get_facet_selection('ville', self.ville_var)
         
         self.load_contacts(filters if filters else None)
     
@@ -209,6 +307,47 @@ class ContactUI:
             else:
                 messagebox.showerror("Erreur", "Erreur lors de la suppression du contact", parent=self.parent)
     
+    def tag_search_results(self):
+        
+        tags = self.tag_mgr.get_all_tags() or []
+        if not tags:
+            messagebox.showwarning("Attention", "Aucun tag n'existe encore", parent=self.parent)
+            return
+        
+        # Filtres de la liste affichée (recherche, catégorie, ville)
+        filters = dict(self.page_filters or {})
+        
+        win = tk.Toplevel(self.parent)
+        win.title("Taguer les résultats")
+        win.geometry("420x200")
+        win.transient(self.parent)
+        win.grab_set()
+        
+        frm = ttk.Frame(win, padding=20)
+        frm.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frm, text=f"Ajouter un tag aux {self.count_var.get()} de la liste :").pack(anchor=tk.W, pady=(0, 10))
+        
+        tag_var = tk.StringVar()
+        tag_combo = ttk.Combobox(frm, textvariable=tag_var, state="readonly",
+                                 values=[tag['nom_tag'] for tag in tags])
+        tag_combo.pack(fill=tk.X, pady=(0, 15))
+        tag_combo.current(0)
+        
+        def submit():
+            tag = tags[tag_combo.current()]
+            ids_query, params = self.contact_mgr.get_matching_ids_query(filters)
+            count = self.tag_mgr.assign_tag_to_matching(tag['id'], ids_query, params)
+            
+            if count is None:
+                messagebox.showerror("Erreur", "Erreur lors de l'assignation du tag", parent=win)
+                return
+            
+            messagebox.showinfo("Succès", f"Tag '{tag['nom_tag']}' ajouté à {count} contact(s)", parent=win)
+            win.destroy()
+        
+        ttk.Button(frm, text="Appliquer", command=submit, style="Accent.TButton").pack(fill=tk.X)
+    
     def view_contact_details(self):
 
         contact_id = self.get_selected_contact_id()
@@ -1,14 +1,16 @@
 import tkinter as tk
 from tkinter import ttk
 from utils.ui_config import COLORS
+from utils.background_executor import BackgroundExecutor
 
 
 class DashboardUI:
 
-    def __init__(self, parent, stats_mgr, rappel_mgr):
+    def __init__(self, parent, stats_mgr, rappel_mgr, executor=None):
         self.parent = parent
         self.stats_mgr = stats_mgr
         self.rappel_mgr = rappel_mgr
+        self.executor = executor or BackgroundExecutor(parent)
         self.tab = None
         self.notebook = None
 
@@ -17,24 +19,36 @@ class DashboardUI:
         self.tab = ttk.Frame(notebook, padding="20")
         notebook.add(self.tab, text="Tableau de bord")
 
-        self._build_content()
+        self.refresh()
 
         notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
     def _on_tab_changed(self, event):
         if self.notebook.select() == str(self.tab):
             self.refresh()
+        else:
+            self.executor.cancel('dashboard')
 
     def refresh(self):
+        # Le contenu actuel reste affiché jusqu'à l'arrivée des nouvelles données
+        self.executor.submit('dashboard', self._fetch_data, on_done=self._show_data)
+
+    def _fetch_data(self):
+        # Exécuté en arrière-plan : (statistiques, rappels du jour, rappels des 7 jours)
+        return (
+            self.stats_mgr.get_statistics_snapshot(),
+            self.rappel_mgr.get_rappels_aujourdhui(),
+            self.rappel_mgr.get_rappels(traite=0, jours_futur=7),
+        )
+
+    def _show_data(self, data):
         for widget in self.tab.winfo_children():
             widget.destroy()
-        self._build_content()
+        self._build_content(*data)
 
-    def _build_content(self):
+    def _build_content(self, stats, rappels, rappels_week):
         ttk.Label(self.tab, text="Tableau de bord", style="Title.TLabel").pack(pady=(0, 25))
 
-        stats = self.stats_mgr.get_global_statistics()
-
         stats_container = ttk.Frame(self.tab)
         stats_container.pack(fill=tk.X, pady=(0, 20))
 
@@ -42,7 +56,7 @@ class DashboardUI:
             ("total_contacts", "Contacts", COLORS['primary']),
             ("total_interactions", "Interactions", COLORS['info']),
             ("total_taches", "Tâches", COLORS['accent_warning']),
-            ("total_rappels", "Rappels", COLORS['accent']),
+            ("rappels_actifs", "Rappels", COLORS['accent']),
             ("rappels_aujourd_hui", "Rappels aujourd'hui", COLORS['error']),
             ("taches_en_cours", "Tâches en cours", COLORS['secondary']),
         ]
@@ -63,8 +77,6 @@ class DashboardUI:
 
         ttk.Label(header_frame, text="Rappels d'aujourd'hui", style="Subtitle.TLabel").pack(side=tk.LEFT)
 
-        rappels = self.rappel_mgr.get_rappels_aujourdhui()
-
         if rappels:
             rappels_card = tk.Frame(rappels_container, bg=COLORS['bg_primary'],
                                    relief="solid", borderwidth=1, highlightthickness=0)
@@ -118,8 +130,6 @@ class DashboardUI:
 
         ttk.Label(week_container, text="Rappels des 7 prochains jours", style="Subtitle.TLabel").pack(anchor=tk.W, pady=(0, 5))
 
-        rappels_week = self.rappel_mgr.get_rappels(traite=0, jours_futur=7)
-
         if rappels_week:
             week_card = tk.Frame(week_container, bg=COLORS['bg_primary'],
                                  relief="solid", borderwidth=1, highlightthickness=0)
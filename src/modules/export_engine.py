@@ -0,0 +1,185 @@
+"""Export complet des contacts vers plusieurs formats en une seule lecture
+
+Les contacts sont lus une fois, en flux, par lots ; chaque lot est transmis à un
+écrivain par fichier (CSV, vCard 3.0/4.0, JSON Lines, compressés en gzip si le nom du
+fichier se termine par .gz). Les écrivains tournent en parallèle sur un pool de
+threads : le formatage d'un format n'attend pas les autres, et la compression
+gzip comme les écritures disque libèrent le GIL.
+"""
+import csv
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.vcard_writer import VCardWriter
+
+
+# Contacts lus par lot, et lots en attente par écrivain (borne la mémoire
+# si un format est plus lent que la lecture)
+EXPORT_BATCH_SIZE = 1000
+EXPORT_QUEUE_SIZE = 4
+
+# Colonnes de l'export CSV
+CSV_FIELDS = [
+    'id', 'civilite', 'nom', 'prenom', 'societe', 'poste', 'categorie',
+    'date_naissance', 'site_web', 'adresse_rue', 'adresse_code_postal',
+    'adresse_ville', 'adresse_pays'
+]
+
+
+def open_export_file(file_path):
+    """Fichier texte UTF-8 en écriture, compressé en gzip si le nom se termine par .gz"""
+    if file_path.endswith('.gz'):
+        return gzip.open(file_path, 'wt', encoding='utf-8', newline='')
+    return open(file_path, 'w', encoding='utf-8', newline='')
+
+
+class CsvExportWriter:
+    """Une ligne CSV par contact (colonnes CSV_FIELDS)"""
+    
+    def __init__(self, f, contact_manager):
+        self.writer = csv.writer(f)
+        self.writer.writerow(CSV_FIELDS)
+    
+    def write_batch(self, contacts):
+        self.writer.writerows([contact[field] for field in CSV_FIELDS] for contact in contacts)
+
+
+class VCardExportWriter:
+    """Une fiche vCard 3.0 par contact ; données liées chargées par lot dans le thread d'écriture"""
+    
+    VERSION = '3.0'
+    
+    def __init__(self, f, contact_manager):
+        self.contact_mgr = contact_manager
+        self.writer = VCardWriter(f, self.VERSION)
+    
+    def write_batch(self, contacts):
+        related = self.contact_mgr.get_related_bulk([contact['id'] for contact in contacts])
+        self.writer.write_batch(contacts, related)
+        self.writer.flush()
+
+
+class VCard4ExportWriter(VCardExportWriter):
+    """Une fiche vCard 4.0 par contact"""
+    
+    VERSION = '4.0'
+
+
+class JsonLinesExportWriter:
+    """Un objet JSON par ligne, avec toutes les colonnes du contact"""
+    
+    def __init__(self, f, contact_manager):
+        self.f = f
+    
+    def write_batch(self, contacts):
+        self.f.write("".join(
+            json.dumps(dict(contact), ensure_ascii=False, default=str) + "\n"
+            for contact in contacts
+        ))
+
+
+EXPORT_WRITERS = {
+    'csv': CsvExportWriter,
+    'vcard': VCardExportWriter,
+    'vcard4': VCard4ExportWriter,
+    'jsonl': JsonLinesExportWriter,
+}
+
+
+class ExportJob:
+    """Export des contacts vers plusieurs fichiers à partir d'une seule lecture
+    
+    targets : liste de (format, chemin), format parmi EXPORT_WRITERS
+    progress_callback(contacts lus, total) est appelé après chaque lot, dans le
+    thread qui exécute run().
+    """
+    
+    def __init__(self, contact_manager, targets, batch_size=EXPORT_BATCH_SIZE, progress_callback=None):
+        for export_format, _ in targets:
+            if export_format not in EXPORT_WRITERS:
+                raise ValueError(f"Format d'export inconnu: {export_format}")
+        
+        self.contact_mgr = contact_manager
+        self.targets = list(targets)
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+        self._failed = threading.Event()
+    
+    def run(self):
+        """Exécute l'export ; retourne {'contacts', 'duree', 'debit', 'fichiers': {chemin: octets}}
+        
+        Lève l'erreur du premier écrivain en échec.
+        """
+        total = self.contact_mgr.count_contacts()
+        start = time.monotonic()
+        count = 0
+        
+        queues = [queue.Queue(maxsize=EXPORT_QUEUE_SIZE) for _ in self.targets]
+        
+        with ThreadPoolExecutor(max_workers=len(self.targets), thread_name_prefix="export") as pool:
+            futures = [
+                pool.submit(self._write, export_format, file_path, batches)
+                for (export_format, file_path), batches in zip(self.targets, queues)
+            ]
+            
+            try:
+                batch = []
+                for contact in self.contact_mgr.stream_contacts():
+                    if self._failed.is_set():
+                        # Un écrivain a échoué : inutile de lire la suite
+                        break
+                    batch.append(contact)
+                    if len(batch) >= self.batch_size:
+                        count += self._dispatch(batch, queues, total, count)
+                        batch = []
+                
+                if batch and not self._failed.is_set():
+                    count += self._dispatch(batch, queues, total, count)
+            finally:
+                # Fin du flux pour chaque écrivain
+                for batches in queues:
+                    batches.put(None)
+        
+        # Remonte la première erreur d'écriture
+        sizes = {}
+        for (_, file_path), future in zip(self.targets, futures):
+            sizes[file_path] = future.result()
+        
+        duration = time.monotonic() - start
+        return {
+            'contacts': count,
+            'duree': duration,
+            'debit': count / duration if duration > 0 else count,
+            'fichiers': sizes,
+        }
+    
+    def _dispatch(self, batch, queues, total, count):
+        for batches in queues:
+            batches.put(batch)
+        
+        if self.progress_callback:
+            self.progress_callback(count + len(batch), total)
+        return len(batch)
+    
+    def _write(self, export_format, file_path, batches):
+        try:
+            with open_export_file(file_path) as f:
+                writer = EXPORT_WRITERS[export_format](f, self.contact_mgr)
+                while True:
+                    batch = batches.get()
+                    if batch is None:
+                        break
+                    writer.write_batch(batch)
+        except Exception:
+            self._failed.set()
+            # Vider la file pour ne pas bloquer la lecture, puis remonter l'erreur
+            while batches.get() is not None:
+                pass
+            raise
+        
+        return os.path.getsize(file_path)
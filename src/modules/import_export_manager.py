@@ -3,21 +3,39 @@ import csv
 import os
 from datetime import datetime
 
+from modules.export_engine import CSV_FIELDS, ExportJob
+from modules.vcard_writer import VCardWriter, write_vcards
+
 
 class ImportExportManager:
     """Gère l'import et l'export de contacts"""
     
+    # Nombre de lignes CSV insérées par transaction
+    IMPORT_CHUNK_SIZE = 1000
+    
+    # Champs de la table contacts alimentés par l'import CSV
+    IMPORT_FIELDS = [
+        'civilite', 'nom', 'prenom', 'societe', 'poste', 'categorie',
+        'photo_path', 'date_naissance', 'anniversaire_professionnel',
+        'site_web', 'adresse_rue', 'adresse_code_postal', 'adresse_ville', 'adresse_pays'
+    ]
+    
     def __init__(self, db_manager, auth_manager, contact_manager):
         self.db = db_manager
         self.auth = auth_manager
         self.contact_mgr = contact_manager
     
-    def import_from_csv(self, file_path, mapping):
+    def import_from_csv(self, file_path, mapping, progress_callback=None):
         """Importe des contacts depuis un fichier CSV
         
+        Le fichier est lu en flux et les contacts sont insérés par lots de
+        IMPORT_CHUNK_SIZE lignes, chaque lot dans une seule transaction.
+        
         Args:
             file_path: Chemin du fichier CSV
             mapping: Dictionnaire de correspondance {colonne_csv: champ_db}
+            progress_callback: Fonction optionnelle appelée après chaque lot
+                avec (nb_lignes_traitees, nb_lignes_estime)
         
         Returns:
             Tuple (success, nb_imported, nb_duplicates, errors)
@@ -26,11 +44,24 @@ class ImportExportManager:
             imported = 0
             duplicates = 0
             errors = []
+            processed = 0
+            total = self._count_csv_rows(file_path)
+            
+            # Clés de doublons chargées une seule fois
+            known_keys, known_noms = self._load_duplicate_keys()
+            date_modification = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            batch = []
+            
+            # Clés du lot en cours : ajoutées aux clés connues seulement si le lot est inséré
+            batch_keys = set()
+            batch_noms = set()
             
             with open(file_path, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
                 
                 for row_num, row in enumerate(reader, start=2):
+                    processed += 1
+                    
                     try:
                         # Créer l'objet contact à partir du mapping
                         contact_data = {}
@@ -39,21 +70,41 @@ class ImportExportManager:
                             if csv_col in row and db_field:
                                 contact_data[db_field] = row[csv_col]
                         
-                        # Vérifier si le contact existe déjà (doublon)
-                        if self.is_duplicate(contact_data):
-                            duplicates += 1
-                            continue
-                        
-                        # Créer le contact
-                        success, contact_id = self.contact_mgr.create_contact(contact_data)
+                        nom = (contact_data.get('nom') or '').strip().lower()
+                        prenom = (contact_data.get('prenom') or '').strip().lower()
                         
-                        if success:
-                            imported += 1
+                        # Vérifier si le contact existe déjà (doublon), en base ou dans le lot en cours
+                        if nom and (
+                            (nom, prenom) in known_keys or (nom, prenom) in batch_keys
+                            or (not prenom and (nom in known_noms or nom in batch_noms))
+                        ):
+                            duplicates += 1
                         else:
-                            errors.append(f"Ligne {row_num}: Erreur création")
+                            batch_keys.add((nom, prenom))
+                            batch_noms.add(nom)
+                            params = [contact_data.get(field, '') for field in self.IMPORT_FIELDS]
+                            batch.append((row_num, params + [date_modification]))
                     
                     except Exception as e:
                         errors.append(f"Ligne {row_num}: {str(e)}")
+                    
+                    if processed % self.IMPORT_CHUNK_SIZE == 0:
+                        if batch:
+                            imported += self._insert_import_batch(batch, errors, batch_keys, batch_noms, known_keys, known_noms)
+                            batch = []
+                            batch_keys = set()
+                            batch_noms = set()
+                        if progress_callback:
+                            progress_callback(processed, total)
+            
+            if batch:
+                imported += self._insert_import_batch(batch, errors, batch_keys, batch_noms, known_keys, known_noms)
+            
+            if progress_callback:
+                progress_callback(processed, max(total, processed))
+            
+            # Nouvelles catégories / villes : listes de filtres à recalculer
+            self.contact_mgr.invalidate_facets()
             
             self.db.log_action(
                 self.auth.current_user['id'],
@@ -68,114 +119,151 @@ class ImportExportManager:
         except Exception as e:
             return False, 0, 0, [str(e)]
     
+    def _count_csv_rows(self, file_path):
+        """Estime le nombre de lignes de données (pour la progression)"""
+        with open(file_path, 'rb') as f:
+            lines = sum(buffer.count(b'\n') for buffer in iter(lambda: f.read(1024 * 1024), b''))
+        return max(lines - 1, 0)
+    
+    def _load_duplicate_keys(self):
+        """Charge les clés (nom, prénom) des contacts existants pour la détection des doublons"""
+        rows = self.db.execute_query("SELECT nom, prenom FROM contacts") or []
+        known_keys = set()
+        known_noms = set()
+        
+        for row in rows:
+            nom = (row['nom'] or '').lower()
+            known_keys.add((nom, (row['prenom'] or '').lower()))
+            known_noms.add(nom)
+        
+        return known_keys, known_noms
+    
+    def _insert_import_batch(self, batch, errors, batch_keys, batch_noms, known_keys, known_noms):
+        """Insère un lot de contacts importés en une seule transaction
+        
+        Les clés de doublons du lot ne rejoignent les clés connues qu'après l'insertion :
+        si le lot échoue, les lignes suivantes de même nom restent importables.
+        """
+        columns = ', '.join(self.IMPORT_FIELDS + ['date_modification'])
+        placeholders = ', '.join(['?'] * (len(self.IMPORT_FIELDS) + 1))
+        query = f"INSERT INTO contacts ({columns}) VALUES ({placeholders})"
+        
+        # Profil 'bulk' (synchronous OFF, grand cache) pour les seules écritures du lot
+        with self.db.temporary_storage_profile('bulk'):
+            result = self.db.execute_many(query, [params for _, params in batch])
+        
+        if result is None:
+            errors.extend(f"Ligne {row_num}: Erreur création" for row_num, _ in batch)
+            return 0
+        
+        known_keys.update(batch_keys)
+        known_noms.update(batch_noms)
+        return len(batch)
+    
     def export_to_csv(self, file_path, contact_ids=None):
         """Exporte des contacts vers un fichier CSV"""
         try:
             # Récupérer les contacts
             if contact_ids:
-                contacts = [self.contact_mgr.get_contact(cid) for cid in contact_ids]
-                contacts = [c for c in contacts if c]  # Filtrer les None
+                contacts = self.contact_mgr.get_contacts_bulk(contact_ids)
+                if not contacts:
+                    return False, "Aucun contact à exporter"
+                rows = ([contact.get(field, '') for field in CSV_FIELDS] for contact in contacts)
             else:
-                contacts = self.contact_mgr.get_all_contacts()
-            
-            if not contacts:
-                return False, "Aucun contact à exporter"
-            
-            # Définir les champs à exporter
-            fieldnames = [
-                'id', 'civilite', 'nom', 'prenom', 'societe', 'poste', 'categorie',
-                'date_naissance', 'site_web', 'adresse_rue', 'adresse_code_postal',
-                'adresse_ville', 'adresse_pays'
-            ]
+                if not self.contact_mgr.count_contacts():
+                    return False, "Aucun contact à exporter"
+                # Lecture en flux : les lignes sont écrites au fur et à mesure, mémoire constante
+                rows = self.contact_mgr.stream_contacts(columns=", ".join(CSV_FIELDS))
             
             with open(file_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
+                writer = csv.writer(f)
+                writer.writerow(CSV_FIELDS)
                 
-                for contact in contacts:
-                    row = {field: contact.get(field, '') for field in fieldnames}
+                count = 0
+                for row in rows:
                     writer.writerow(row)
+                    count += 1
             
             self.db.log_action(
                 self.auth.current_user['id'],
                 "Export CSV",
                 "contacts",
                 None,
-                f"{len(contacts)} contacts exportés"
+                f"{count} contacts exportés"
             )
             
-            return True, f"{len(contacts)} contacts exportés avec succès"
+            return True, f"{count} contacts exportés avec succès"
         
         except Exception as e:
             return False, str(e)
     
-    def export_to_vcard(self, file_path, contact_ids=None):
-        """Exporte des contacts au format vCard (.vcf)"""
+    def export_to_vcard(self, file_path, contact_ids=None, version='3.0'):
+        """Exporte des contacts au format vCard (.vcf), version '3.0' ou '4.0'"""
         try:
             # Récupérer les contacts
             if contact_ids:
-                contacts = [self.contact_mgr.get_contact(cid) for cid in contact_ids]
-                contacts = [c for c in contacts if c]
+                contacts = self.contact_mgr.get_contacts_bulk(contact_ids)
+                if not contacts:
+                    return False, "Aucun contact à exporter"
             else:
-                contacts = self.contact_mgr.get_all_contacts()
+                if not self.contact_mgr.count_contacts():
+                    return False, "Aucun contact à exporter"
+                contacts = None
+            
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                if contacts is not None:
+                    # Contacts complets : coordonnées, réseaux et tags déjà chargés
+                    writer = VCardWriter(f, version)
+                    for contact in contacts:
+                        writer.write(contact, contact['coordonnees'], contact['reseaux_sociaux'], contact['tags'])
+                    writer.flush()
+                    count = writer.count
+                else:
+                    # Lecture en flux, données liées chargées par lots : mémoire constante
+                    count = write_vcards(f, self.contact_mgr.stream_contacts(), self.contact_mgr, version)
+            
+            self.db.log_action(
+                self.auth.current_user['id'],
+                "Export vCard",
+                "contacts",
+                None,
+                f"{count} contacts exportés"
+            )
             
-            if not contacts:
+            return True, f"{count} contacts exportés avec succès"
+        
+        except Exception as e:
+            return False, str(e)
+    
+    def export_all(self, targets, progress_callback=None):
+        """Exporte tous les contacts vers plusieurs fichiers en une seule lecture
+        
+        Args:
+            targets: Liste de (format, chemin) ; formats 'csv', 'vcard', 'vcard4', 'jsonl',
+                     fichier compressé en gzip si le chemin se termine par .gz
+            progress_callback: Appelé avec (contacts lus, total) après chaque lot
+        """
+        try:
+            if not targets:
+                return False, "Aucun format d'export sélectionné"
+            if not self.contact_mgr.count_contacts():
                 return False, "Aucun contact à exporter"
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                for contact in contacts:
-                    # Format vCard 3.0
-                    f.write("BEGIN:VCARD\n")
-                    f.write("VERSION:3.0\n")
-                    
-                    # Nom
-                    nom = contact.get('nom', '')
-                    prenom = contact.get('prenom', '')
-                    f.write(f"N:{nom};{prenom};;;\n")
-                    f.write(f"FN:{prenom} {nom}\n")
-                    
-                    # Société et poste
-                    if contact.get('societe'):
-                        f.write(f"ORG:{contact['societe']}\n")
-                    if contact.get('poste'):
-                        f.write(f"TITLE:{contact['poste']}\n")
-                    
-                    # Coordonnées
-                    if contact.get('coordonnees'):
-                        for coord in contact['coordonnees']:
-                            if coord['type_coord'] == 'email':
-                                f.write(f"EMAIL:{coord['valeur']}\n")
-                            elif coord['type_coord'] in ['mobile', 'fixe', 'telephone']:
-                                f.write(f"TEL;TYPE=CELL:{coord['valeur']}\n")
-                    
-                    # Adresse
-                    rue = contact.get('adresse_rue', '')
-                    ville = contact.get('adresse_ville', '')
-                    cp = contact.get('adresse_code_postal', '')
-                    pays = contact.get('adresse_pays', '')
-                    
-                    if rue or ville:
-                        f.write(f"ADR:;;{rue};{ville};;{cp};{pays}\n")
-                    
-                    # URL
-                    if contact.get('site_web'):
-                        f.write(f"URL:{contact['site_web']}\n")
-                    
-                    # Date de naissance
-                    if contact.get('date_naissance'):
-                        f.write(f"BDAY:{contact['date_naissance']}\n")
-                    
-                    f.write("END:VCARD\n\n")
+            result = ExportJob(self.contact_mgr, targets, progress_callback=progress_callback).run()
             
+            message = (
+                f"{result['contacts']} contacts exportés vers {len(result['fichiers'])} fichier(s) "
+                f"en {result['duree']:.1f} s ({result['debit']:.0f} contacts/s)"
+            )
             self.db.log_action(
                 self.auth.current_user['id'],
-                "Export vCard",
+                "Export complet",
                 "contacts",
                 None,
-                f"{len(contacts)} contacts exportés"
+                message
             )
             
-            return True, f"{len(contacts)} contacts exportés avec succès"
+            return True, message
         
         except Exception as e:
             return False, str(e)
@@ -226,8 +314,9 @@ class ImportExportManager:
         """
         try:
             # Récupérer les deux contacts
-            contact_keep = self.contact_mgr.get_contact(keep_id)
-            contact_delete = self.contact_mgr.get_contact(delete_id)
+            contacts = {c['id']: c for c in self.contact_mgr.get_contacts_bulk([keep_id, delete_id])}
+            contact_keep = contacts.get(keep_id)
+            contact_delete = contacts.get(delete_id)
             
             if not contact_keep or not contact_delete:
                 return False, "Contact introuvable"
@@ -246,35 +335,39 @@ class ImportExportManager:
                 else:
                     merged_data[field] = contact_delete.get(field, '')
             
-            # Mettre à jour le contact à conserver
-            self.contact_mgr.update_contact(keep_id, merged_data)
-            
-            # Transférer les relations du contact à supprimer vers le contact à conserver
-            self.db.execute_update(
-                "UPDATE interactions SET contact_id = ? WHERE contact_id = ?",
-                (keep_id, delete_id)
-            )
-            
-            self.db.execute_update(
-                "UPDATE rappels SET contact_id = ? WHERE contact_id = ?",
-                (keep_id, delete_id)
-            )
-            
-            self.db.execute_update(
-                "UPDATE tache_contacts SET contact_id = ? WHERE contact_id = ?",
-                (keep_id, delete_id)
-            )
-            
-            # Supprimer le contact
-            self.contact_mgr.delete_contact(delete_id)
-            
-            self.db.log_action(
-                self.auth.current_user['id'],
-                "Fusion contacts",
-                "contacts",
-                keep_id,
-                f"Fusion {delete_id} -> {keep_id}"
-            )
+            # Fusion complète dans une seule transaction : tout ou rien
+            with self.db.temporary_storage_profile('bulk'), self.db.transaction():
+                # Mettre à jour le contact à conserver
+                if not self.contact_mgr.update_contact(keep_id, merged_data):
+                    raise RuntimeError("Erreur lors de la mise à jour du contact conservé")
+                
+                # Transférer les relations du contact à supprimer vers le contact à conserver
+                self.db.execute_update(
+                    "UPDATE interactions SET contact_id = ? WHERE contact_id = ?",
+                    (keep_id, delete_id)
+                )
+                
+                self.db.execute_update(
+                    "UPDATE rappels SET contact_id = ? WHERE contact_id = ?",
+                    (keep_id, delete_id)
+                )
+                
+                # OR IGNORE : une tâche déjà liée aux deux contacts garde un seul lien
+                self.db.execute_update(
+                    "UPDATE OR IGNORE tache_contacts SET contact_id = ? WHERE contact_id = ?",
+                    (keep_id, delete_id)
+                )
+                
+                # Supprimer le contact
+                self.contact_mgr.delete_contact(delete_id)
+                
+                self.db.log_action(
+                    self.auth.current_user['id'],
+                    "Fusion contacts",
+                    "contacts",
+                    keep_id,
+                    f"Fusion {delete_id} -> {keep_id}"
+                )
             
             return True, "Contacts fusionnés avec succès"
         
@@ -1,13 +1,42 @@
+import os
 import tkinter as tk
+from datetime import datetime
 from tkinter import ttk, messagebox, filedialog
+from utils.background_executor import BackgroundExecutor
 
 
 class ImportExportUI:
     
-    def __init__(self, root, import_export_mgr, db):
+    # Intervalle (ms) de mise à jour de la progression d'un import/export
+    PROGRESS_POLL_INTERVAL = 200
+    
+    def __init__(self, root, import_export_mgr, db, executor=None):
         self.root = root
         self.import_export_mgr = import_export_mgr
         self.db = db
+        self.executor = executor or BackgroundExecutor(root)
+        self.running_job = None
+    
+    def _start_job(self, name):
+        """Réserve l'exécution d'un import/export (un seul à la fois)"""
+        if self.running_job:
+            messagebox.showwarning("En cours", f"{self.running_job} est déjà en cours", parent=self.root)
+            return False
+        self.running_job = name
+        return True
+    
+    def _poll_progress(self, win, progress, update):
+        # La progression est relevée dans le thread Tk, jamais depuis le thread de travail
+        if not win.winfo_exists():
+            return
+        if progress:
+            update(*progress[-1])
+        if self.running_job:
+            self.root.after(self.PROGRESS_POLL_INTERVAL, self._poll_progress, win, progress, update)
+    
+    def _result_parent(self, win):
+        # Fenêtre de progression fermée pendant le traitement : message sur la fenêtre principale
+        return win if win.winfo_exists() else self.root
     
     def import_csv(self):
         file_path = filedialog.askopenfilename(
@@ -115,20 +144,59 @@ class ImportExportUI:
                 messagebox.showerror("Erreur", "Aucune colonne mappée", parent=win)
                 return
 
-            success, imported, duplicates, errors = self.import_export_mgr.import_from_csv(file_path, mapping)
+            if not self._start_job("Un import"):
+                return
 
-            if success:
-                msg = f"Import terminé:\n- {imported} contact(s) importé(s)\n- {duplicates} doublon(s) ignoré(s)"
-                if errors:
-                    msg += f"\n- {len(errors)} erreur(s)"
-                messagebox.showinfo("Résultat", msg, parent=win)
-                win.destroy()
-            else:
-                messagebox.showerror("Erreur", f"Erreur: {errors}", parent=win)
+            progress_var = tk.DoubleVar(value=0)
+            progress_label = ttk.Label(progress_frame, text="Import en cours...")
+            progress_label.pack(anchor=tk.W)
+            ttk.Progressbar(progress_frame, variable=progress_var, maximum=100, mode="determinate").pack(fill=tk.X, pady=(5, 0))
+            import_btn.config(state="disabled")
+
+            # Dernière progression signalée par le thread d'import
+            progress = []
+
+            def show_progress(processed, total):
+                progress_var.set(min(100, processed * 100 / total) if total else 100)
+                progress_label.config(text=f"Import en cours... {processed} ligne(s) traitée(s)")
+
+            def on_done(result):
+                self.running_job = None
+                success, imported, duplicates, errors = result
+                parent = self._result_parent(win)
+
+                if success:
+                    msg = f"Import terminé:\n- {imported} contact(s) importé(s)\n- {duplicates} doublon(s) ignoré(s)"
+                    if errors:
+                        msg += f"\n- {len(errors)} erreur(s)"
+                    messagebox.showinfo("Résultat", msg, parent=parent)
+                    if parent is win:
+                        win.destroy()
+                else:
+                    if parent is win:
+                        for widget in progress_frame.winfo_children():
+                            widget.destroy()
+                        import_btn.config(state="normal")
+                    messagebox.showerror("Erreur", f"Erreur: {errors}", parent=parent)
+
+            def on_error(error):
+                self.running_job = None
+                messagebox.showerror("Erreur", f"Erreur: {error}", parent=self._result_parent(win))
+
+            self.executor.submit(
+                'import', self.import_export_mgr.import_from_csv, file_path, mapping,
+                progress_callback=lambda processed, total: progress.append((processed, total)),
+                on_done=on_done, on_error=on_error
+            )
+            self._poll_progress(win, progress, show_progress)
+
+        progress_frame = ttk.Frame(frm)
+        progress_frame.pack(fill=tk.X, pady=(15, 0))
 
         btn_frame = ttk.Frame(frm)
         btn_frame.pack(fill=tk.X, pady=(15, 0))
-        ttk.Button(btn_frame, text="Importer", command=do_import, style="Accent.TButton").pack(side=tk.LEFT, padx=5)
+        import_btn = ttk.Button(btn_frame, text="Importer", command=do_import, style="Accent.TButton")
+        import_btn.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Annuler", command=win.destroy).pack(side=tk.LEFT, padx=5)
     
     def export_csv(self):
@@ -143,18 +211,78 @@ class ImportExportUI:
             else:
                 messagebox.showerror("Erreur", message)
     
-    def export_vcard(self):
+    def export_vcard(self, version='3.0'):
         file_path = filedialog.asksaveasfilename(
             defaultextension=".vcf",
             filetypes=[("vCard files", "*.vcf"), ("All files", "*.*")]
         )
         if file_path:
-            success, message = self.import_export_mgr.export_to_vcard(file_path)
+            success, message = self.import_export_mgr.export_to_vcard(file_path, version=version)
             if success:
                 messagebox.showinfo("Succès", message)
             else:
                 messagebox.showerror("Erreur", message)
     
+    def export_all(self):
+        output_dir = filedialog.askdirectory(title="Choisir le dossier d'export")
+        if not output_dir:
+            return
+
+        if not self._start_job("Un export"):
+            return
+
+        compress = messagebox.askyesno("Export complet", "Compresser les fichiers (gzip) ?")
+        suffix = ".gz" if compress else ""
+        base = os.path.join(output_dir, f"contacts_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        targets = [
+            ('csv', f"{base}.csv{suffix}"),
+            ('vcard', f"{base}.vcf{suffix}"),
+            ('jsonl', f"{base}.jsonl{suffix}"),
+        ]
+
+        win = tk.Toplevel(self.root)
+        win.title("Export complet")
+        win.transient(self.root)
+
+        frm = ttk.Frame(win, padding=20)
+        frm.pack(fill=tk.BOTH, expand=True)
+
+        progress_label = ttk.Label(frm, text="Export en cours...")
+        progress_label.pack(anchor=tk.W)
+        progress_var = tk.DoubleVar(value=0)
+        ttk.Progressbar(frm, variable=progress_var, maximum=100, mode="determinate", length=350).pack(fill=tk.X, pady=(5, 0))
+
+        # Dernière progression signalée par le thread d'export
+        progress = []
+
+        def show_progress(processed, total):
+            progress_var.set(min(100, processed * 100 / total) if total else 100)
+            progress_label.config(text=f"Export en cours... {processed}/{total} contact(s)")
+
+        def on_done(result):
+            self.running_job = None
+            success, message = result
+            if win.winfo_exists():
+                win.destroy()
+
+            if success:
+                messagebox.showinfo("Succès", message, parent=self.root)
+            else:
+                messagebox.showerror("Erreur", message, parent=self.root)
+
+        def on_error(error):
+            self.running_job = None
+            if win.winfo_exists():
+                win.destroy()
+            messagebox.showerror("Erreur", str(error), parent=self.root)
+
+        self.executor.submit(
+            'export', self.import_export_mgr.export_all, targets,
+            progress_callback=lambda processed, total: progress.append((processed, total)),
+            on_done=on_done, on_error=on_error
+        )
+        self._poll_progress(win, progress, show_progress)
+    
     def detect_duplicates(self):
         duplicates = self.import_export_mgr.find_duplicates()
         if duplicates:
@@ -1,13 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from utils.background_executor import BackgroundExecutor
+
 
 class InteractionUI:
     
-    def __init__(self, root, interaction_mgr, contact_mgr):
+    def __init__(self, root, interaction_mgr, contact_mgr, executor=None):
         self.root = root
         self.interaction_mgr = interaction_mgr
         self.contact_mgr = contact_mgr
+        self.executor = executor or BackgroundExecutor(root)
         self.interactions_tree = None
     
     def create_interactions_tab(self, notebook):
@@ -129,12 +132,16 @@ class InteractionUI:
     def load_interactions(self):
         if not self.interactions_tree:
             return
-            
+        
+        self.executor.submit(
+            'interactions', self.interaction_mgr.get_interactions, limit=100,
+            on_done=self._show_interactions
+        )
+    
+    def _show_interactions(self, interactions):
         for item in self.interactions_tree.get_children():
             self.interactions_tree.delete(item)
 
-        interactions = self.interaction_mgr.get_interactions(limit=100)
-
         if interactions:
             for inter in interactions:
                 contact_name = f"{inter['prenom']} {inter['nom']}"
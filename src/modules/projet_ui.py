@@ -1,14 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from utils.background_executor import BackgroundExecutor
+
 
 class ProjetUI:
     
-    def __init__(self, root, projet_mgr, task_mgr=None, contact_mgr=None):
+    def __init__(self, root, projet_mgr, task_mgr=None, contact_mgr=None, executor=None):
         self.root = root
         self.projet_mgr = projet_mgr
         self.task_mgr = task_mgr
         self.contact_mgr = contact_mgr
+        self.executor = executor or BackgroundExecutor(root)
         self.projets_tree = None
         self.selected_projet_id = None
     
@@ -168,9 +171,6 @@ class ProjetUI:
         if not self.projets_tree:
             return
         
-        for item in self.projets_tree.get_children():
-            self.projets_tree.delete(item)
-        
         contact_filter = None
         if self.contact_filter_var.get() and self.contact_filter_var.get() != "Tous les contacts":
             try:
@@ -179,39 +179,34 @@ class ProjetUI:
             except:
                 pass
         
-        projets = self.projet_mgr.get_all_projets()
+        self.executor.submit('projets', self._fetch_projets, contact_filter, on_done=self._show_projets)
+    
+    def _fetch_projets(self, contact_filter):
+        # Exécuté en arrière-plan : projets et statistiques en une seule requête
+        rows = []
+        projets = self.projet_mgr.get_projets_overview(contact_filter)
         
         if projets:
             for projet in projets:
-                tasks = []
-                contacts_impliques = set()
-                
-                if self.task_mgr:
-                    tasks = self.task_mgr.get_tasks_by_projet(projet['id'])
-                    for task in tasks:
-                        task_contacts = self.task_mgr.get_task_contacts(task['id'])
-                        for tc in task_contacts:
-                            contacts_impliques.add(tc['id'])
-                
-                if contact_filter and contact_filter not in contacts_impliques:
-                    continue
-                
-                completed_tasks = sum(1 for t in tasks if t['statut'] == 'Terminé')
-                total_tasks = len(tasks)
-                avancement = int((completed_tasks / total_tasks * 100)) if total_tasks > 0 else 0
-                
-                contacts_str = f"{len(contacts_impliques)} contact(s)"
-                
-                self.projets_tree.insert("", "end", values=(
+                rows.append((
                     projet['id'],
                     projet['nom'],
                     projet['objectif'] or '',
                     projet['date_debut'] or '',
                     projet['date_fin_previsionnelle'] or '',
-                    f"{avancement}%",
-                    total_tasks,
-                    contacts_str
+                    f"{projet['avancement']}%",
+                    projet['total_taches'],
+                    f"{projet['nb_contacts']} contact(s)"
                 ))
+        
+        return rows
+    
+    def _show_projets(self, rows):
+        for item in self.projets_tree.get_children():
+            self.projets_tree.delete(item)
+        
+        for values in rows:
+            self.projets_tree.insert("", "end", values=values)
     
     def delete_projet(self):
         selected = self.projets_tree.selection()
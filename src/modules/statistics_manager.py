@@ -1,6 +1,66 @@
 """Module de statistiques et rapports"""
 from datetime import datetime
-import os
+import importlib.util
+import threading
+import time
+
+from modules import chart_renderer
+from utils import columnar
+
+
+# Compteurs de stats_counters, dans l'ordre d'affichage
+GLOBAL_COUNTERS = [
+    'total_contacts',
+    'total_interactions',
+    'rappels_actifs',
+    'total_taches',
+    'taches_en_cours',
+    'total_tags',
+    'total_projets',
+]
+
+SNAPSHOT_KEYS = GLOBAL_COUNTERS + ['rappels_aujourd_hui', 'taches_semaine']
+
+# Durée (secondes) pendant laquelle un instantané des statistiques est réutilisé
+SNAPSHOT_TTL = 5.0
+
+# Compteurs du tableau de bord en une seule requête : compteurs matérialisés
+# + rappels du jour et tâches non terminées à échéance dans les 7 jours
+SNAPSHOT_QUERY = """
+    SELECT
+        MAX(CASE WHEN nom = 'total_contacts' THEN valeur END) as total_contacts,
+        MAX(CASE WHEN nom = 'total_interactions' THEN valeur END) as total_interactions,
+        MAX(CASE WHEN nom = 'rappels_actifs' THEN valeur END) as rappels_actifs,
+        MAX(CASE WHEN nom = 'total_taches' THEN valeur END) as total_taches,
+        MAX(CASE WHEN nom = 'taches_en_cours' THEN valeur END) as taches_en_cours,
+        MAX(CASE WHEN nom = 'total_tags' THEN valeur END) as total_tags,
+        MAX(CASE WHEN nom = 'total_projets' THEN valeur END) as total_projets,
+        (SELECT COUNT(*) FROM rappels
+         WHERE traite = 0
+           AND date_heure >= DATE('now') AND date_heure < DATE('now', '+1 day')) as rappels_aujourd_hui,
+        (SELECT COUNT(*) FROM taches
+         WHERE statut IS NOT 'Terminé'
+           AND date_echeance >= DATE('now') AND date_echeance < DATE('now', '+8 days')) as taches_semaine
+    FROM stats_counters
+"""
+
+# Requêtes partagées par les méthodes get_* et l'export CSV (lu en flux)
+REPARTITION_QUERY = """
+    SELECT valeur as {column}, nombre
+    FROM stats_contacts_repartition
+    WHERE dimension = ?
+    ORDER BY nombre DESC
+"""
+
+MOST_ACTIVE_QUERY = """
+    SELECT c.id, c.nom, c.prenom, c.societe, COUNT(i.id) as nb_interactions
+    FROM contacts c
+    LEFT JOIN interactions i ON c.id = i.contact_id
+    GROUP BY c.id, c.nom, c.prenom, c.societe
+    HAVING nb_interactions > 0
+    ORDER BY nb_interactions DESC
+    LIMIT ?
+"""
 
 
 class StatisticsManager:
@@ -8,50 +68,35 @@ class StatisticsManager:
     
     def __init__(self, db_manager):
         self.db = db_manager
+        self._snapshot = None
+        self._snapshot_time = 0.0
+        self._snapshot_lock = threading.Lock()
+    
+    def _get_repartition(self, dimension, column):
+        """Répartition des contacts lue dans les statistiques matérialisées"""
+        return self.db.execute_query(REPARTITION_QUERY.format(column=column), (dimension,))
     
     def get_contacts_by_category(self):
         """Nombre de contacts par catégorie"""
-        query = """
-            SELECT categorie, COUNT(*) as nombre
-            FROM contacts
-            WHERE categorie IS NOT NULL AND categorie != ''
-            GROUP BY categorie
-            ORDER BY nombre DESC
-        """
-        return self.db.execute_query(query)
+        return self._get_repartition('categorie', 'categorie')
     
     def get_contacts_by_tag(self):
         """Nombre de contacts par tag"""
         query = """
-            SELECT t.nom_tag, COUNT(ct.contact_id) as nombre
+            SELECT t.nom_tag, COALESCE(st.nombre, 0) as nombre
             FROM tags t
-            LEFT JOIN contact_tags ct ON t.id = ct.tag_id
-            GROUP BY t.id, t.nom_tag
+            LEFT JOIN stats_tags st ON st.tag_id = t.id
             ORDER BY nombre DESC
         """
         return self.db.execute_query(query)
     
     def get_contacts_by_city(self):
         """Nombre de contacts par ville"""
-        query = """
-            SELECT adresse_ville as ville, COUNT(*) as nombre
-            FROM contacts
-            WHERE adresse_ville IS NOT NULL AND adresse_ville != ''
-            GROUP BY adresse_ville
-            ORDER BY nombre DESC
-        """
-        return self.db.execute_query(query)
+        return self._get_repartition('ville', 'ville')
     
     def get_contacts_by_country(self):
         """Nombre de contacts par pays"""
-        query = """
-            SELECT adresse_pays as pays, COUNT(*) as nombre
-            FROM contacts
-            WHERE adresse_pays IS NOT NULL AND adresse_pays != ''
-            GROUP BY adresse_pays
-            ORDER BY nombre DESC
-        """
-        return self.db.execute_query(query)
+        return self._get_repartition('pays', 'pays')
     
     def get_contacts_evolution(self, period='month'):
         """Évolution du nombre de contacts dans le temps"""
@@ -62,6 +107,10 @@ class StatisticsManager:
             date_format = '%Y'
             label = 'Année'
         
+        columns = self._get_evolution_columns(date_format)
+        return list(zip(columns['periode'], columnar.to_list(columns['nombre']))) if columns else []
+    
+    def _get_evolution_columns(self, date_format):
         query = f"""
             SELECT strftime('{date_format}', date_creation) as periode, COUNT(*) as nombre
             FROM contacts
@@ -69,59 +118,89 @@ class StatisticsManager:
             GROUP BY periode
             ORDER BY periode
         """
-        
-        result = self.db.execute_query(query)
-        return [(r['periode'], r['nombre']) for r in result] if result else []
+        return self.db.execute_columns(query, numeric={'nombre': columnar.INTEGER})
     
     def get_most_active_contacts(self, limit=10):
         """Contacts avec le plus d'interactions"""
+        return self.db.execute_query(MOST_ACTIVE_QUERY, (limit,))
+    
+    def get_contacts_growth(self, period='month', window=3):
+        """Croissance du nombre de contacts, calculée sur des colonnes
+        
+        Retourne {'periodes', 'nouveaux', 'cumul', 'moyenne_mobile'} : nouveaux
+        contacts par période, total cumulé et moyenne mobile sur `window` périodes.
+        """
+        columns = self._get_evolution_columns('%Y-%m' if period == 'month' else '%Y')
+        if columns is None:
+            return None
+        
+        nouveaux = columns['nombre']
+        return {
+            'periodes': columns['periode'],
+            'nouveaux': nouveaux,
+            'cumul': columnar.cumulative_sum(nouveaux),
+            'moyenne_mobile': columnar.rolling_mean(nouveaux, window),
+        }
+    
+    def get_interactions_percentiles(self, ranks=(50, 75, 90, 99)):
+        """Percentiles du nombre d'interactions par contact : {rang: valeur}"""
         query = """
-            SELECT c.id, c.nom, c.prenom, c.societe, COUNT(i.id) as nb_interactions
+            SELECT COUNT(i.id) as nb_interactions
             FROM contacts c
             LEFT JOIN interactions i ON c.id = i.contact_id
-            GROUP BY c.id, c.nom, c.prenom, c.societe
-            HAVING nb_interactions > 0
-            ORDER BY nb_interactions DESC
-            LIMIT ?
+            GROUP BY c.id
         """
-        return self.db.execute_query(query, (limit,))
+        columns = self.db.execute_columns(query, numeric={'nb_interactions': columnar.INTEGER})
+        if columns is None:
+            return None
+        return columnar.percentiles(columns['nb_interactions'], list(ranks))
     
-    def get_global_statistics(self):
-        """Statistiques globales"""
-        stats = {}
-        
-        # Total contacts
-        result = self.db.execute_query("SELECT COUNT(*) as total FROM contacts")
-        stats['total_contacts'] = result[0]['total'] if result else 0
-        
-        # Total interactions
-        result = self.db.execute_query("SELECT COUNT(*) as total FROM interactions")
-        stats['total_interactions'] = result[0]['total'] if result else 0
+    def get_statistics_snapshot(self, max_age=SNAPSHOT_TTL):
+        """Tous les compteurs du tableau de bord, en une requête
         
-        # Total rappels actifs
-        result = self.db.execute_query("SELECT COUNT(*) as total FROM rappels WHERE traite = 0")
-        stats['rappels_actifs'] = result[0]['total'] if result else 0
+        Clés : celles de get_global_statistics, plus rappels_aujourd_hui et
+        taches_semaine. L'instantané est réutilisé pendant max_age secondes
+        (0 pour forcer la relecture).
+        """
+        with self._snapshot_lock:
+            if self._snapshot is not None and time.monotonic() - self._snapshot_time < max_age:
+                return dict(self._snapshot)
         
-        # Total tâches
-        result = self.db.execute_query("SELECT COUNT(*) as total FROM taches")
-        stats['total_taches'] = result[0]['total'] if result else 0
+        result = self.db.execute_query(SNAPSHOT_QUERY)
+        row = result[0] if result else {}
+        snapshot = {key: row.get(key) or 0 for key in SNAPSHOT_KEYS}
         
-        # Tâches en cours
-        result = self.db.execute_query("SELECT COUNT(*) as total FROM taches WHERE statut = 'En cours'")
-        stats['taches_en_cours'] = result[0]['total'] if result else 0
+        if result is not None:
+            with self._snapshot_lock:
+                self._snapshot = snapshot
+                self._snapshot_time = time.monotonic()
         
-        # Total tags
-        result = self.db.execute_query("SELECT COUNT(*) as total FROM tags")
-        stats['total_tags'] = result[0]['total'] if result else 0
+        return dict(snapshot)
+    
+    def invalidate_snapshot(self):
+        """Le prochain instantané sera relu depuis la base"""
+        with self._snapshot_lock:
+            self._snapshot = None
+    
+    def get_global_statistics(self):
+        """Statistiques globales, lues dans les compteurs tenus à jour par triggers"""
+        stats = dict.fromkeys(GLOBAL_COUNTERS, 0)
         
-        # Total projets
-        result = self.db.execute_query("SELECT COUNT(*) as total FROM projets")
-        stats['total_projets'] = result[0]['total'] if result else 0
+        result = self.db.execute_query("SELECT nom, valeur FROM stats_counters")
+        for row in result or []:
+            if row['nom'] in stats:
+                stats[row['nom']] = row['valeur']
         
         return stats
     
+    def rebuild_statistics(self):
+        """Recalcule les statistiques matérialisées à partir des tables"""
+        success = self.db.rebuild_statistics()
+        self.invalidate_snapshot()
+        return success
+    
     def export_statistics_to_csv(self, file_path):
-        """Exporte les statistiques vers un fichier CSV"""
+        """Exporte les statistiques vers un fichier CSV (lignes écrites en flux)"""
         import csv
         
         try:
@@ -139,23 +218,25 @@ class StatisticsManager:
                 # Par catégorie
                 writer.writerow(["=== CONTACTS PAR CATÉGORIE ==="])
                 writer.writerow(["Catégorie", "Nombre"])
-                for row in self.get_contacts_by_category():
-                    writer.writerow([row['categorie'], row['nombre']])
+                writer.writerows(self.db.iter_query(
+                    REPARTITION_QUERY.format(column='categorie'), ('categorie',)
+                ))
                 
                 writer.writerow([])
                 
                 # Par ville
                 writer.writerow(["=== CONTACTS PAR VILLE ==="])
                 writer.writerow(["Ville", "Nombre"])
-                for row in self.get_contacts_by_city():
-                    writer.writerow([row['ville'], row['nombre']])
+                writer.writerows(self.db.iter_query(
+                    REPARTITION_QUERY.format(column='ville'), ('ville',)
+                ))
                 
                 writer.writerow([])
                 
                 # Contacts les plus actifs
                 writer.writerow(["=== CONTACTS LES PLUS ACTIFS ==="])
                 writer.writerow(["Nom", "Prénom", "Société", "Nb Interactions"])
-                for row in self.get_most_active_contacts():
+                for row in self.db.iter_query(MOST_ACTIVE_QUERY, (10,)):
                     writer.writerow([
                         row['nom'], row['prenom'],
                         row['societe'] or '', row['nb_interactions']
@@ -166,75 +247,74 @@ class StatisticsManager:
         except Exception as e:
             return False, str(e)
     
+    def get_charts_data(self):
+        """Données des graphiques, calculées une fois avant le rendu
+        
+        Retourne une liste de (nom_fichier, fonction_de_rendu, kwargs) pour chart_renderer.
+        """
+        charts = []
+        
+        # 1. Camembert par catégorie
+        data = self.get_contacts_by_category()
+        if data:
+            charts.append(('contacts_par_categorie.png', chart_renderer.render_pie, {
+                'title': 'Répartition des contacts par catégorie',
+                'labels': [row['categorie'] for row in data],
+                'values': [row['nombre'] for row in data],
+            }))
+        
+        # 2. Barres par ville (top 10)
+        data = self.get_contacts_by_city()
+        if data:
+            top_10 = data[:10]
+            charts.append(('contacts_par_ville.png', chart_renderer.render_bar, {
+                'title': 'Top 10 des villes',
+                'labels': [row['ville'] for row in top_10],
+                'values': [row['nombre'] for row in top_10],
+                'xlabel': 'Ville',
+                'ylabel': 'Nombre de contacts',
+            }))
+        
+        # 3. Évolution dans le temps
+        data = self.get_contacts_evolution('month')
+        if data and len(data) > 1:
+            charts.append(('evolution_contacts.png', chart_renderer.render_line, {
+                'title': 'Évolution des ajouts de contacts par mois',
+                'labels': [d[0] for d in data],
+                'values': [d[1] for d in data],
+                'xlabel': 'Période',
+                'ylabel': 'Nombre de nouveaux contacts',
+            }))
+        
+        # 4. Contacts les plus actifs
+        data = self.get_most_active_contacts(10)
+        if data:
+            charts.append(('contacts_actifs.png', chart_renderer.render_barh, {
+                'title': 'Top 10 des contacts les plus actifs',
+                'labels': [f"{row['prenom']} {row['nom']}" for row in data],
+                'values': [row['nb_interactions'] for row in data],
+                'xlabel': 'Nombre d\'interactions',
+            }))
+        
+        return charts
+    
+    def start_charts(self, output_dir):
+        """Lance le rendu des graphiques en parallèle (un processus par graphique)
+        
+        Retourne {nom_fichier: future}, sans attendre la fin des rendus.
+        Lève ImportError si Matplotlib n'est pas installé.
+        """
+        if importlib.util.find_spec('matplotlib') is None:
+            raise ImportError("Matplotlib n'est pas installé")
+        
+        return chart_renderer.submit_charts(self.get_charts_data(), output_dir)
+    
     def generate_charts(self, output_dir):
-        """Génère des graphiques avec Matplotlib"""
+        """Génère des graphiques avec Matplotlib et attend la fin des rendus"""
         try:
-            import matplotlib.pyplot as plt
-            import matplotlib
-            matplotlib.use('Agg')  # Backend non-interactif
-            
-            os.makedirs(output_dir, exist_ok=True)
-            
-            # 1. Camembert par catégorie
-            data = self.get_contacts_by_category()
-            if data:
-                labels = [row['categorie'] for row in data]
-                sizes = [row['nombre'] for row in data]
-                
-                plt.figure(figsize=(10, 6))
-                plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-                plt.title('Répartition des contacts par catégorie')
-                plt.axis('equal')
-                plt.savefig(os.path.join(output_dir, 'contacts_par_categorie.png'))
-                plt.close()
-            
-            # 2. Barres par ville (top 10)
-            data = self.get_contacts_by_city()
-            if data:
-                top_10 = data[:10]
-                villes = [row['ville'] for row in top_10]
-                nombres = [row['nombre'] for row in top_10]
-                
-                plt.figure(figsize=(12, 6))
-                plt.bar(villes, nombres)
-                plt.xlabel('Ville')
-                plt.ylabel('Nombre de contacts')
-                plt.title('Top 10 des villes')
-                plt.xticks(rotation=45, ha='right')
-                plt.tight_layout()
-                plt.savefig(os.path.join(output_dir, 'contacts_par_ville.png'))
-                plt.close()
-            
-            # 3. Évolution dans le temps
-            data = self.get_contacts_evolution('month')
-            if data and len(data) > 1:
-                periodes = [d[0] for d in data]
-                nombres = [d[1] for d in data]
-                
-                plt.figure(figsize=(12, 6))
-                plt.plot(periodes, nombres, marker='o')
-                plt.xlabel('Période')
-                plt.ylabel('Nombre de nouveaux contacts')
-                plt.title('Évolution des ajouts de contacts par mois')
-                plt.xticks(rotation=45, ha='right')
-                plt.grid(True)
-                plt.tight_layout()
-                plt.savefig(os.path.join(output_dir, 'evolution_contacts.png'))
-                plt.close()
-            
-            # 4. Contacts les plus actifs
-            data = self.get_most_active_contacts(10)
-            if data:
-                noms = [f"{row['prenom']} {row['nom']}" for row in data]
-                interactions = [row['nb_interactions'] for row in data]
-                
-                plt.figure(figsize=(12, 6))
-                plt.barh(noms, interactions)
-                plt.xlabel('Nombre d\'interactions')
-                plt.title('Top 10 des contacts les plus actifs')
-                plt.tight_layout()
-                plt.savefig(os.path.join(output_dir, 'contacts_actifs.png'))
-                plt.close()
+            futures = self.start_charts(output_dir)
+            for future in futures.values():
+                future.result()
             
             return True, "Graphiques générés avec succès"
         
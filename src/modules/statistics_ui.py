@@ -1,12 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+from utils.background_executor import BackgroundExecutor
 
 
 class StatisticsUI:
     
-    def __init__(self, root, stats_mgr):
+    # Intervalle (ms) de vérification des rendus de graphiques
+    CHARTS_POLL_INTERVAL = 200
+    
+    def __init__(self, root, stats_mgr, executor=None):
         self.root = root
         self.stats_mgr = stats_mgr
+        self.executor = executor or BackgroundExecutor(root)
     
     def show_statistics(self):
         stats = self.stats_mgr.get_global_statistics()
@@ -16,11 +21,57 @@ class StatisticsUI:
     def generate_charts(self):
         output_dir = filedialog.askdirectory(title="Choisir le dossier de sortie")
         if output_dir:
-            success, message = self.stats_mgr.generate_charts(output_dir)
-            if success:
-                messagebox.showinfo("Succès", message, parent=self.root)
-            else:
-                messagebox.showerror("Erreur", message, parent=self.root)
+            # Requêtes en arrière-plan, puis un processus de rendu par graphique
+            self.executor.submit(
+                'charts', self.stats_mgr.start_charts, output_dir,
+                on_done=self._show_charts_progress, on_error=self._show_charts_error
+            )
+    
+    def _show_charts_error(self, error):
+        if isinstance(error, ImportError):
+            messagebox.showerror("Erreur", "Matplotlib n'est pas installé", parent=self.root)
+        else:
+            messagebox.showerror("Erreur", str(error), parent=self.root)
+    
+    def _show_charts_progress(self, futures):
+        if not futures:
+            messagebox.showinfo("Graphiques", "Aucune donnée à représenter", parent=self.root)
+            return
+        
+        win = tk.Toplevel(self.root)
+        win.title("Génération des graphiques")
+        win.transient(self.root)
+        
+        frm = ttk.Frame(win, padding=20)
+        frm.pack(fill=tk.BOTH, expand=True)
+        
+        status_vars = {}
+        for row, file_name in enumerate(futures):
+            ttk.Label(frm, text=file_name).grid(row=row, column=0, sticky="w", padx=(0, 15), pady=3)
+            status_vars[file_name] = tk.StringVar(value="En cours...")
+            ttk.Label(frm, textvariable=status_vars[file_name]).grid(row=row, column=1, sticky="w", pady=3)
+        
+        close_btn = ttk.Button(frm, text="Fermer", command=win.destroy, state="disabled")
+        close_btn.grid(row=len(futures), column=0, columnspan=2, pady=(15, 0))
+        
+        self._poll_charts(win, futures, status_vars, close_btn)
+    
+    def _poll_charts(self, win, futures, status_vars, close_btn):
+        if not win.winfo_exists():
+            return
+        
+        pending = False
+        for file_name, future in futures.items():
+            if not future.done():
+                pending = True
+            elif status_vars[file_name].get() == "En cours...":
+                error = future.exception()
+                status_vars[file_name].set("Terminé" if error is None else f"Erreur: {error}")
+        
+        if pending:
+            self.root.after(self.CHARTS_POLL_INTERVAL, self._poll_charts, win, futures, status_vars, close_btn)
+        else:
+            close_btn.config(state="normal")
     
     def export_statistics(self):
         file_path = filedialog.asksaveasfilename(
@@ -0,0 +1,131 @@
+"""Index des tags en mémoire : un ensemble de bits (entier Python) par tag"""
+import threading
+
+
+def ids_to_bitset(ids):
+    """Construit un ensemble de bits (bit n = contact d'ID n) à partir d'IDs"""
+    ids = list(ids)
+    if not ids:
+        return 0
+    
+    buffer = bytearray(max(ids) // 8 + 1)
+    for contact_id in ids:
+        buffer[contact_id >> 3] |= 1 << (contact_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def bitset_to_ids(bits):
+    """IDs (croissants) des bits à 1"""
+    ids = []
+    binary = format(bits, 'b')[::-1]
+    position = binary.find('1')
+    while position != -1:
+        ids.append(position)
+        position = binary.find('1', position + 1)
+    return ids
+
+
+class TagIndex:
+    """Index tag -> contacts chargé une fois, puis tenu à jour par TagManager
+    
+    Les expressions de tags sont évaluées par opérations sur les bits :
+    - un ID de tag (int)
+    - ('AND', expr, expr, ...) : tous
+    - ('OR', expr, expr, ...) : au moins un
+    - ('NOT', expr) : contacts n'ayant pas expr
+    
+    Les contacts supprimés peuvent rester dans l'index (les IDs ne sont jamais
+    réutilisés) : ils disparaissent lors du chargement des contacts trouvés.
+    """
+    
+    def __init__(self, db_manager):
+        self.db = db_manager
+        self._bitsets = None
+        self._stale_tags = set()
+        self._lock = threading.RLock()
+    
+    def _ensure_loaded(self):
+        if self._bitsets is not None:
+            return
+        
+        ids_by_tag = {}
+        for row in self.db.iter_query("SELECT tag_id, contact_id FROM contact_tags"):
+            ids_by_tag.setdefault(row['tag_id'], []).append(row['contact_id'])
+        
+        self._bitsets = {tag_id: ids_to_bitset(ids) for tag_id, ids in ids_by_tag.items()}
+        self._stale_tags.clear()
+    
+    def _tag_bitset(self, tag_id):
+        if tag_id in self._stale_tags:
+            rows = self.db.execute_query(
+                "SELECT contact_id FROM contact_tags WHERE tag_id = ?", (tag_id,)
+            ) or []
+            self._bitsets[tag_id] = ids_to_bitset(row['contact_id'] for row in rows)
+            self._stale_tags.discard(tag_id)
+        return self._bitsets.get(tag_id, 0)
+    
+    def _all_contacts_bitset(self):
+        result = self.db.execute_query("SELECT MAX(id) as max_id FROM contacts")
+        max_id = result[0]['max_id'] if result and result[0]['max_id'] else 0
+        # Tous les IDs de 1 à max_id
+        return (1 << (max_id + 1)) - 2
+    
+    def evaluate(self, expression):
+        """IDs croissants des contacts correspondant à l'expression"""
+        with self._lock:
+            self._ensure_loaded()
+            return bitset_to_ids(self._evaluate(expression))
+    
+    def _evaluate(self, expression):
+        if isinstance(expression, int):
+            return self._tag_bitset(expression)
+        
+        operator, *operands = expression
+        operator = operator.upper()
+        
+        if operator == 'AND':
+            bits = self._evaluate(operands[0])
+            for operand in operands[1:]:
+                if not bits:
+                    break
+                bits &= self._evaluate(operand)
+            return bits
+        
+        if operator == 'OR':
+            bits = 0
+            for operand in operands:
+                bits |= self._evaluate(operand)
+            return bits
+        
+        if operator == 'NOT':
+            return self._all_contacts_bitset() & ~self._evaluate(operands[0])
+        
+        raise ValueError(f"Opérateur de tags inconnu: {operator}")
+    
+    def add(self, tag_id, contact_ids):
+        with self._lock:
+            if self._bitsets is not None:
+                self._bitsets[tag_id] = self._tag_bitset(tag_id) | ids_to_bitset(contact_ids)
+    
+    def remove(self, tag_id, contact_ids):
+        with self._lock:
+            if self._bitsets is not None:
+                self._bitsets[tag_id] = self._tag_bitset(tag_id) & ~ids_to_bitset(contact_ids)
+    
+    def drop_tag(self, tag_id):
+        with self._lock:
+            if self._bitsets is not None:
+                self._bitsets.pop(tag_id, None)
+                self._stale_tags.discard(tag_id)
+    
+    def invalidate_tag(self, tag_id):
+        """Le tag sera relu depuis la base à sa prochaine utilisation"""
+        with self._lock:
+            if self._bitsets is not None:
+                self._stale_tags.add(tag_id)
+    
+    def invalidate(self):
+        """L'index complet sera rechargé à la prochaine recherche"""
+        with self._lock:
+            self._bitsets = None
+            self._stale_tags.clear()
@@ -1,12 +1,23 @@
 """Module de gestion des tags et relations"""
+import sqlite3
+
+from modules.tag_index import TagIndex
 
 
 class TagManager:
     """Gère les tags personnalisés"""
     
+    # Nombre d'IDs par clause IN (reste sous la limite de variables SQLite)
+    BULK_CHUNK_SIZE = 500
+    
+    # Séparateur de GROUP_CONCAT (absent des noms de tags saisis)
+    TAG_SEPARATOR = '\x1f'
+    
     def __init__(self, db_manager, auth_manager):
         self.db = db_manager
         self.auth = auth_manager
+        # Index tag -> contacts pour les recherches par tags, tenu à jour par ce manager après chaque commit
+        self.index = TagIndex(db_manager)
     
     def create_tag(self, nom_tag):
         """Crée un nouveau tag"""
@@ -37,6 +48,7 @@ class TagManager:
         success = self.db.execute_delete("DELETE FROM tags WHERE id = ?", (tag_id,))
         
         if success:
+            self.db.after_commit(lambda: self.index.drop_tag(tag_id))
             self.db.log_action(
                 self.auth.current_user['id'],
                 "Suppression tag",
@@ -49,14 +61,101 @@ class TagManager:
     def assign_tag_to_contact(self, tag_id, contact_id):
         """Assigne un tag à un contact"""
         query = "INSERT OR IGNORE INTO contact_tags (contact_id, tag_id) VALUES (?, ?)"
-        return self.db.execute_insert(query, (contact_id, tag_id))
+        result = self.db.execute_insert(query, (contact_id, tag_id))
+        if result is not None:
+            self.db.after_commit(lambda: self.index.add(tag_id, [contact_id]))
+        return result
     
     def remove_tag_from_contact(self, tag_id, contact_id):
         """Retire un tag d'un contact"""
-        return self.db.execute_delete(
+        success = self.db.execute_delete(
             "DELETE FROM contact_tags WHERE contact_id = ? AND tag_id = ?",
             (contact_id, tag_id)
         )
+        if success:
+            self.db.after_commit(lambda: self.index.remove(tag_id, [contact_id]))
+        return success
+    
+    def assign_tag_bulk(self, tag_id, contact_ids):
+        """Assigne un tag à plusieurs contacts (une transaction, une entrée de log)
+        
+        Returns:
+            Nombre de contacts nouvellement tagués, None en cas d'erreur
+        """
+        count = self._update_tag_bulk(
+            "INSERT OR IGNORE INTO contact_tags (contact_id, tag_id) VALUES (?, ?)",
+            tag_id, contact_ids, "Assignation tag"
+        )
+        if count:
+            self.db.after_commit(lambda: self.index.add(tag_id, contact_ids))
+        return count
+    
+    def remove_tag_bulk(self, tag_id, contact_ids):
+        """Retire un tag de plusieurs contacts (une transaction, une entrée de log)
+        
+        Returns:
+            Nombre de contacts détagués, None en cas d'erreur
+        """
+        count = self._update_tag_bulk(
+            "DELETE FROM contact_tags WHERE contact_id = ? AND tag_id = ?",
+            tag_id, contact_ids, "Retrait tag"
+        )
+        if count:
+            self.db.after_commit(lambda: self.index.remove(tag_id, contact_ids))
+        return count
+    
+    def _update_tag_bulk(self, query, tag_id, contact_ids, action):
+        if not contact_ids:
+            return 0
+        
+        try:
+            with self.db.transaction():
+                count = self.db.execute_many(query, [(contact_id, tag_id) for contact_id in contact_ids])
+                
+                if count is not None:
+                    self.db.log_action(
+                        self.auth.current_user['id'],
+                        action,
+                        "tags",
+                        tag_id,
+                        f"{count} contact(s)"
+                    )
+            return count
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la mise à jour des tags: {e}")
+            return None
+    
+    def assign_tag_to_matching(self, tag_id, ids_query, params=()):
+        """Assigne un tag à tous les contacts sélectionnés par une sous-requête d'IDs
+        
+        Exécuté entièrement par SQLite (INSERT ... SELECT), sans charger les IDs en Python.
+        Voir ContactManager.get_matching_ids_query pour tagger le résultat d'une recherche.
+        
+        Returns:
+            Nombre de contacts nouvellement tagués, None en cas d'erreur
+        """
+        query = f"""
+            INSERT OR IGNORE INTO contact_tags (contact_id, tag_id)
+            SELECT id, ? FROM ({ids_query})
+        """
+        
+        try:
+            with self.db.transaction() as connection:
+                count = connection.execute(query, [tag_id] + list(params)).rowcount
+                
+                self.db.log_action(
+                    self.auth.current_user['id'],
+                    "Assignation tag (recherche)",
+                    "tags",
+                    tag_id,
+                    f"{count} contact(s)"
+                )
+            # Contacts ajoutés inconnus côté Python : le tag sera relu depuis la base
+            self.db.after_commit(lambda: self.index.invalidate_tag(tag_id))
+            return count
+        except sqlite3.Error as e:
+            print(f"Erreur lors de l'assignation du tag: {e}")
+            return None
     
     def get_contacts_by_tag(self, tag_id):
         """Récupère tous les contacts ayant un tag spécifique"""
@@ -80,6 +179,31 @@ class TagManager:
         """
         return self.db.execute_query(query, (contact_id,))
     
+    def get_tag_names_by_contacts(self, contact_ids):
+        """Récupère les noms de tags de plusieurs contacts en une requête par lot d'IDs
+        
+        Returns:
+            Dictionnaire {contact_id: [noms de tags triés]} (liste vide sans tag)
+        """
+        tag_names = {contact_id: [] for contact_id in contact_ids}
+        ids = list(tag_names)
+        
+        for start in range(0, len(ids), self.BULK_CHUNK_SIZE):
+            chunk = ids[start:start + self.BULK_CHUNK_SIZE]
+            placeholders = ','.join(['?' for _ in chunk])
+            query = f"""
+                SELECT ct.contact_id, GROUP_CONCAT(t.nom_tag, ?) as tags
+                FROM contact_tags ct
+                JOIN tags t ON t.id = ct.tag_id
+                WHERE ct.contact_id IN ({placeholders})
+                GROUP BY ct.contact_id
+            """
+            for row in self.db.execute_query(query, [self.TAG_SEPARATOR] + chunk) or []:
+                # L'ordre de GROUP_CONCAT n'est pas garanti par SQLite : tri en Python
+                tag_names[row['contact_id']] = sorted(row['tags'].split(self.TAG_SEPARATOR))
+        
+        return tag_names
+    
     def count_contacts_by_tag(self, tag_id):
         """Compte le nombre de contacts ayant un tag"""
         query = "SELECT COUNT(*) as count FROM contact_tags WHERE tag_id = ?"
@@ -91,65 +215,46 @@ class TagManager:
         if not tag_ids:
             return []
         
-        placeholders = ','.join(['?' for _ in tag_ids])
-        query = f"""
-            SELECT c.*
-            FROM contacts c
-            WHERE (
-                SELECT COUNT(DISTINCT tag_id)
-                FROM contact_tags ct
-                WHERE ct.contact_id = c.id AND ct.tag_id IN ({placeholders})
-            ) = ?
-            ORDER BY c.nom, c.prenom
-        """
-        params = tag_ids + [len(tag_ids)]
-        return self.db.execute_query(query, params)
+        return self.search_contacts_by_tag_expression(('AND', *tag_ids))
     
     def search_contacts_by_tags_or(self, tag_ids):
         """Recherche contacts ayant AU MOINS UN des tags (opérateur OU)"""
         if not tag_ids:
             return []
         
-        placeholders = ','.join(['?' for _ in tag_ids])
-        query = f"""
-            SELECT DISTINCT c.*
-            FROM contacts c
-            JOIN contact_tags ct ON c.id = ct.contact_id
-            WHERE ct.tag_id IN ({placeholders})
-            ORDER BY c.nom, c.prenom
-        """
-        return self.db.execute_query(query, tag_ids)
+        return self.search_contacts_by_tag_expression(('OR', *tag_ids))
     
     def get_contacts_by_tags(self, tag_ids, operator='AND'):
         """Récupère les contacts ayant certains tags"""
         if not tag_ids:
             return []
         
-        if operator == 'AND':
-            # Tous les tags doivent être présents
-            query = f"""
-                SELECT c.*
-                FROM contacts c
-                WHERE (
-                    SELECT COUNT(DISTINCT tag_id)
-                    FROM contact_tags ct
-                    WHERE ct.contact_id = c.id AND ct.tag_id IN ({','.join(['?' for _ in tag_ids])})
-                ) = ?
-                ORDER BY c.nom, c.prenom
-            """
-            params = tag_ids + [len(tag_ids)]
-        else:  # OR
-            # Au moins un tag doit être présent
-            query = f"""
-                SELECT DISTINCT c.*
-                FROM contacts c
-                JOIN contact_tags ct ON c.id = ct.contact_id
-                WHERE ct.tag_id IN ({','.join(['?' for _ in tag_ids])})
-                ORDER BY c.nom, c.prenom
-            """
-            params = tag_ids
+        return self.search_contacts_by_tag_expression((operator, *tag_ids))
+    
+    def search_contacts_by_tag_expression(self, expression):
+        """Recherche les contacts correspondant à une expression de tags (voir TagIndex)
         
-        return self.db.execute_query(query, params)
+        Exemple : ('AND', vip_id, ('NOT', ('OR', archive_id, perdu_id)))
+        L'expression est évaluée sur l'index en mémoire ; seuls les contacts
+        trouvés sont lus en base, triés par nom et prénom.
+        """
+        try:
+            contact_ids = self.index.evaluate(expression)
+        except sqlite3.Error as e:
+            print(f"Erreur lors du chargement de l'index des tags: {e}")
+            return []
+        
+        contacts = []
+        
+        for start in range(0, len(contact_ids), self.BULK_CHUNK_SIZE):
+            chunk = contact_ids[start:start + self.BULK_CHUNK_SIZE]
+            placeholders = ','.join(['?' for _ in chunk])
+            contacts.extend(
+                self.db.execute_query(f"SELECT * FROM contacts WHERE id IN ({placeholders})", chunk) or []
+            )
+        
+        contacts.sort(key=lambda c: (c['nom'], c['prenom'] or '', c['id']))
+        return contacts
     
     def get_tag_statistics(self):
         """Statistiques sur les tags"""
@@ -132,6 +132,7 @@ class TagRelationUI:
         self.operator_var = tk.StringVar(value="ET")
         ttk.Radiobutton(search_top_frame, text="ET (tous les tags)", variable=self.operator_var, value="ET").pack(side=tk.LEFT, padx=10)
         ttk.Radiobutton(search_top_frame, text="OU (au moins un tag)", variable=self.operator_var, value="OU").pack(side=tk.LEFT, padx=10)
+        ttk.Radiobutton(search_top_frame, text="NON (aucun de ces tags)", variable=self.operator_var, value="NON").pack(side=tk.LEFT, padx=10)
         
         ttk.Button(search_top_frame, text="Rechercher", command=self.search_by_tags, style="Accent.TButton").pack(side=tk.LEFT, padx=10)
         
@@ -293,11 +294,10 @@ class TagRelationUI:
             to_add = selected_contact_ids - already_tagged_ids
             to_remove = already_tagged_ids - selected_contact_ids
             
-            for contact_id in to_add:
-                self.tag_mgr.assign_tag_to_contact(tag_id, contact_id)
-            
-            for contact_id in to_remove:
-                self.tag_mgr.remove_tag_from_contact(tag_id, contact_id)
+            if self.tag_mgr.assign_tag_bulk(tag_id, list(to_add)) is None or \
+                    self.tag_mgr.remove_tag_bulk(tag_id, list(to_remove)) is None:
+                messagebox.showerror("Erreur", "Erreur lors de l'enregistrement des tags", parent=win)
+                return
             
             messagebox.showinfo("Succès", f"{len(to_add)} contact(s) ajouté(s), {len(to_remove)} retiré(s)", parent=win)
             win.destroy()
@@ -322,6 +322,8 @@ class TagRelationUI:
         
         if operator == "ET":
             contacts = self.tag_mgr.search_contacts_by_tags_and(tag_ids)
+        elif operator == "NON":
+            contacts = self.tag_mgr.search_contacts_by_tag_expression(('NOT', ('OR', *tag_ids)))
         else:
             contacts = self.tag_mgr.search_contacts_by_tags_or(tag_ids)
         
@@ -367,9 +369,11 @@ class TagRelationUI:
         result_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         vsb.pack(side=tk.RIGHT, fill=tk.Y)
         
+        # Tags de tous les résultats en une seule passe
+        tag_names = self.tag_mgr.get_tag_names_by_contacts([contact['id'] for contact in contacts])
+        
         for contact in contacts:
-            contact_tags = self.tag_mgr.get_tags_by_contact(contact['id'])
-            tags_str = ", ".join([t['nom_tag'] for t in contact_tags])
+            tags_str = ", ".join(tag_names[contact['id']])
             
             result_tree.insert("", "end", values=(
                 contact['id'],
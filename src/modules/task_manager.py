@@ -19,30 +19,35 @@ class TaskManager:
             VALUES (?, ?, ?, ?, ?, ?)
         """
         
-        task_id = self.db.execute_insert(
-            query,
-            (titre, description, date_echeance, priorite, statut, projet_id)
-        )
-        
-        if task_id:
-            # Associer les contacts à la tâche
-            for contact_id in contact_ids:
-                self.db.execute_insert(
-                    "INSERT INTO tache_contacts (tache_id, contact_id) VALUES (?, ?)",
-                    (task_id, contact_id)
+        try:
+            # Tâche, contacts associés et log : une seule transaction
+            with self.db.transaction():
+                task_id = self.db.execute_insert(
+                    query,
+                    (titre, description, date_echeance, priorite, statut, projet_id)
                 )
-            
-            self.db.log_action(
-                self.auth.current_user['id'],
-                "Création tâche",
-                "taches",
-                task_id,
-                titre
-            )
-            
-            return True, task_id
-        
-        return False, None
+                
+                if task_id:
+                    # Associer les contacts à la tâche
+                    self.db.execute_many(
+                        "INSERT INTO tache_contacts (tache_id, contact_id) VALUES (?, ?)",
+                        [(task_id, contact_id) for contact_id in contact_ids]
+                    )
+                    
+                    self.db.log_action(
+                        self.auth.current_user['id'],
+                        "Création tâche",
+                        "taches",
+                        task_id,
+                        titre
+                    )
+                    
+                    return True, task_id
+                
+                return False, None
+        except Exception as e:
+            print(f"Erreur création tâche: {e}")
+            return False, None
     
     def update_task(self, task_id, titre, description, priorite, statut, date_echeance, projet_id=None):
         """Met à jour une tâche"""
@@ -284,6 +289,60 @@ class ProjetManager:
         query = "SELECT * FROM projets ORDER BY date_creation DESC"
         return self.db.execute_query(query)
     
+    def get_projets_overview(self, contact_id=None):
+        """Récupère tous les projets avec leurs statistiques en une seule requête
+        
+        Chaque projet contient total_taches, taches_terminees, avancement (en %)
+        et nb_contacts (contacts distincts impliqués dans ses tâches).
+        
+        Args:
+            contact_id: Ne garder que les projets dont une tâche implique ce contact
+        """
+        query = """
+            SELECT p.*,
+                   COALESCE(t.total_taches, 0) as total_taches,
+                   COALESCE(t.taches_terminees, 0) as taches_terminees,
+                   COALESCE(c.nb_contacts, 0) as nb_contacts
+            FROM projets p
+            LEFT JOIN (
+                SELECT projet_id,
+                       COUNT(*) as total_taches,
+                       SUM(CASE WHEN statut = 'Terminé' THEN 1 ELSE 0 END) as taches_terminees
+                FROM taches
+                WHERE projet_id IS NOT NULL
+                GROUP BY projet_id
+            ) t ON t.projet_id = p.id
+            LEFT JOIN (
+                SELECT ta.projet_id, COUNT(DISTINCT tc.contact_id) as nb_contacts
+                FROM tache_contacts tc
+                JOIN taches ta ON ta.id = tc.tache_id
+                WHERE ta.projet_id IS NOT NULL
+                GROUP BY ta.projet_id
+            ) c ON c.projet_id = p.id
+        """
+        params = []
+        
+        if contact_id:
+            query += """
+                WHERE EXISTS (
+                    SELECT 1
+                    FROM tache_contacts tc
+                    JOIN taches ta ON ta.id = tc.tache_id
+                    WHERE ta.projet_id = p.id AND tc.contact_id = ?
+                )
+            """
+            params.append(contact_id)
+        
+        query += " ORDER BY p.date_creation DESC"
+        
+        projets = self.db.execute_query(query, params if params else None)
+        
+        for projet in projets or []:
+            total = projet['total_taches']
+            projet['avancement'] = int(projet['taches_terminees'] / total * 100) if total > 0 else 0
+        
+        return projets
+    
     def get_projet_by_id(self, projet_id):
         """Récupère un projet par son ID"""
         query = "SELECT * FROM projets WHERE id = ?"
@@ -1,13 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
+from utils.background_executor import BackgroundExecutor
+
 
 class TaskUI:
     
-    def __init__(self, root, task_mgr, contact_mgr):
+    def __init__(self, root, task_mgr, contact_mgr, executor=None):
         self.root = root
         self.task_mgr = task_mgr
         self.contact_mgr = contact_mgr
+        self.executor = executor or BackgroundExecutor(root)
         self.tasks_tree = None
     
     def create_tasks_tab(self, notebook):
@@ -142,12 +145,13 @@ class TaskUI:
     def load_tasks(self):
         if not self.tasks_tree:
             return
-            
+        
+        self.executor.submit('tasks', self.task_mgr.get_tasks, on_done=self._show_tasks)
+    
+    def _show_tasks(self, tasks):
         for item in self.tasks_tree.get_children():
             self.tasks_tree.delete(item)
         
-        tasks = self.task_mgr.get_tasks()
-        
         if tasks:
             for task in tasks:
                 self.tasks_tree.insert("", "end", values=(
@@ -0,0 +1,254 @@
+"""Export vCard 3.0 (RFC 2426) et 4.0 (RFC 6350)
+
+Les coordonnées, réseaux sociaux et tags sont chargés par lots de contacts
+(ContactManager.get_related_bulk), les valeurs sont échappées, les lignes
+repliées à 75 octets et terminées par CRLF, et les fiches écrites par blocs.
+"""
+import re
+
+
+VCARD_VERSIONS = ('3.0', '4.0')
+
+# Longueur maximale d'une ligne, en octets UTF-8 hors CRLF
+VCARD_LINE_LENGTH = 75
+
+# Caractères accumulés avant chaque écriture dans le fichier
+VCARD_BUFFER_SIZE = 1 << 20
+
+# Contacts dont les données liées sont chargées ensemble
+VCARD_BATCH_SIZE = 500
+
+# type_coord -> (propriété, TYPE en 3.0, TYPE en 4.0)
+COORD_PROPERTIES = {
+    'tel_mobile': ('TEL', 'CELL', 'cell'),
+    'tel_fixe': ('TEL', 'HOME,VOICE', 'home,voice'),
+    'tel_pro': ('TEL', 'WORK,VOICE', 'work,voice'),
+    'email_pro': ('EMAIL', 'INTERNET,WORK', 'work'),
+    'email_perso': ('EMAIL', 'INTERNET,HOME', 'home'),
+    # Types des anciennes versions
+    'mobile': ('TEL', 'CELL', 'cell'),
+    'fixe': ('TEL', 'VOICE', 'voice'),
+    'telephone': ('TEL', 'VOICE', 'voice'),
+    'email': ('EMAIL', 'INTERNET', None),
+}
+
+ISO_DATE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+
+
+def escape_text(value):
+    """Échappe une valeur texte : \\ , ; et retours à la ligne"""
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace(',', '\\,')
+        .replace(';', '\\;')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+
+def param_value(value):
+    """Valeur de paramètre, entre guillemets si elle contient , ; ou :"""
+    value = str(value).replace('"', "'")
+    return f'"{value}"' if any(c in value for c in ',;:') else value
+
+
+def fold_line(line):
+    """Replie une ligne à VCARD_LINE_LENGTH octets ; les suites commencent par une espace
+    
+    Le découpage ne coupe jamais un caractère UTF-8 multi-octets.
+    """
+    if line.isascii():
+        if len(line) <= VCARD_LINE_LENGTH:
+            return line
+        parts = [line[:VCARD_LINE_LENGTH]]
+        for start in range(VCARD_LINE_LENGTH, len(line), VCARD_LINE_LENGTH - 1):
+            parts.append(line[start:start + VCARD_LINE_LENGTH - 1])
+        return '\r\n '.join(parts)
+    
+    if len(line.encode('utf-8')) <= VCARD_LINE_LENGTH:
+        return line
+    
+    parts = []
+    current = []
+    size = 0
+    limit = VCARD_LINE_LENGTH
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > limit:
+            parts.append(''.join(current))
+            current = []
+            size = 0
+            # L'espace de continuation compte dans la longueur
+            limit = VCARD_LINE_LENGTH - 1
+        current.append(char)
+        size += char_size
+    parts.append(''.join(current))
+    return '\r\n '.join(parts)
+
+
+class VCardSerializer:
+    """Transforme un contact et ses données liées en fiche vCard"""
+    
+    def __init__(self, version='3.0'):
+        if version not in VCARD_VERSIONS:
+            raise ValueError(f"Version vCard non supportée: {version}")
+        self.version = version
+    
+    def serialize(self, contact, coordonnees=(), reseaux_sociaux=(), tags=()):
+        """Fiche complète (BEGIN à END), lignes repliées et terminées par CRLF"""
+        v4 = self.version == '4.0'
+        lines = ["BEGIN:VCARD", f"VERSION:{self.version}"]
+        
+        # Nom : nom;prénom;autres prénoms;civilité;suffixe
+        nom = contact.get('nom') or ''
+        prenom = contact.get('prenom') or ''
+        civilite = contact.get('civilite') or ''
+        lines.append(f"N:{escape_text(nom)};{escape_text(prenom)};;{escape_text(civilite)};")
+        lines.append(f"FN:{escape_text(f'{prenom} {nom}'.strip())}")
+        
+        # Société et poste
+        if contact.get('societe'):
+            lines.append(f"ORG:{escape_text(contact['societe'])}")
+        if contact.get('poste'):
+            lines.append(f"TITLE:{escape_text(contact['poste'])}")
+        
+        # Coordonnées
+        for coord in coordonnees:
+            line = self._coordonnee(coord, v4)
+            if line:
+                lines.append(line)
+        
+        # Adresse : boîte postale;complément;rue;ville;région;code postal;pays
+        rue = contact.get('adresse_rue') or ''
+        ville = contact.get('adresse_ville') or ''
+        cp = contact.get('adresse_code_postal') or ''
+        pays = contact.get('adresse_pays') or ''
+        
+        if rue or ville or cp or pays:
+            lines.append(
+                f"ADR:;;{escape_text(rue)};{escape_text(ville)};;{escape_text(cp)};{escape_text(pays)}"
+            )
+        
+        # URL
+        if contact.get('site_web'):
+            lines.append(f"URL:{contact['site_web']}")
+        
+        # Réseaux sociaux
+        for reseau in reseaux_sociaux:
+            if not reseau['url']:
+                continue
+            plateforme = param_value((reseau['plateforme'] or '').lower())
+            if v4:
+                lines.append(f"SOCIALPROFILE;SERVICE-TYPE={plateforme}:{reseau['url']}")
+            else:
+                lines.append(f"X-SOCIALPROFILE;TYPE={plateforme}:{reseau['url']}")
+        
+        # Date de naissance
+        if contact.get('date_naissance'):
+            lines.append(self._birthday(str(contact['date_naissance']), v4))
+        
+        # Tags
+        if tags:
+            lines.append("CATEGORIES:" + ",".join(escape_text(tag['nom_tag']) for tag in tags))
+        
+        # Notes
+        if contact.get('notes'):
+            lines.append(f"NOTE:{escape_text(contact['notes'])}")
+        
+        lines.append("END:VCARD")
+        return "\r\n".join(fold_line(line) for line in lines) + "\r\n"
+    
+    def _coordonnee(self, coord, v4):
+        type_coord = coord['type_coord'] or ''
+        valeur = coord['valeur']
+        if not valeur:
+            return None
+        
+        if type_coord in COORD_PROPERTIES:
+            prop, type_v3, type_v4 = COORD_PROPERTIES[type_coord]
+        elif 'mail' in type_coord:
+            prop, type_v3, type_v4 = 'EMAIL', 'INTERNET', None
+        elif type_coord.startswith('tel'):
+            prop, type_v3, type_v4 = 'TEL', 'VOICE', 'voice'
+        else:
+            return None
+        
+        params = []
+        if v4:
+            if type_v4:
+                params.append(f"TYPE={type_v4}")
+            if coord.get('principal'):
+                params.append("PREF=1")
+        else:
+            types = type_v3 + (',PREF' if coord.get('principal') else '')
+            params.append(f"TYPE={types}")
+        
+        return f"{prop}{''.join(';' + param for param in params)}:{escape_text(valeur)}"
+    
+    def _birthday(self, date, v4):
+        match = ISO_DATE.match(date)
+        if not v4:
+            return f"BDAY:{date}"
+        if match:
+            # Format de base ISO 8601 (AAAAMMJJ) en 4.0
+            return f"BDAY:{''.join(match.groups())}"
+        return f"BDAY;VALUE=text:{escape_text(date)}"
+
+
+class VCardWriter:
+    """Écrit des fiches vCard dans un fichier texte par blocs de VCARD_BUFFER_SIZE caractères
+    
+    Le fichier doit être ouvert avec newline='' (les fins de ligne sont déjà CRLF).
+    """
+    
+    def __init__(self, f, version='3.0', buffer_size=VCARD_BUFFER_SIZE):
+        self.f = f
+        self.serializer = VCardSerializer(version)
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._buffered = 0
+        self.count = 0
+    
+    def write(self, contact, coordonnees=(), reseaux_sociaux=(), tags=()):
+        card = self.serializer.serialize(contact, coordonnees, reseaux_sociaux, tags)
+        self._buffer.append(card)
+        self._buffered += len(card)
+        self.count += 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+    
+    def write_batch(self, contacts, related):
+        """Écrit des contacts dont les données liées viennent de get_related_bulk"""
+        empty = {'coordonnees': (), 'reseaux_sociaux': (), 'tags': ()}
+        for contact in contacts:
+            data = related.get(contact['id'], empty)
+            self.write(contact, data['coordonnees'], data['reseaux_sociaux'], data['tags'])
+    
+    def flush(self):
+        if self._buffer:
+            self.f.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+
+def write_vcards(f, contacts, contact_manager, version='3.0', batch_size=VCARD_BATCH_SIZE):
+    """Écrit des contacts (itérable, éventuellement en flux) au format vCard
+    
+    Les données liées sont chargées par lots de batch_size contacts.
+    Retourne le nombre de fiches écrites.
+    """
+    writer = VCardWriter(f, version)
+    batch = []
+    for contact in contacts:
+        batch.append(contact)
+        if len(batch) >= batch_size:
+            writer.write_batch(batch, contact_manager.get_related_bulk([c['id'] for c in batch]))
+            batch = []
+    
+    if batch:
+        writer.write_batch(batch, contact_manager.get_related_bulk([c['id'] for c in batch]))
+    
+    writer.flush()
+    return writer.count
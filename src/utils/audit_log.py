@@ -0,0 +1,105 @@
+"""Journal d'audit tamponné : les entrées de logs sont écrites par lots en arrière-plan"""
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+
+# Taille d'un lot et délai maximal (secondes) avant écriture des entrées en attente
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_INTERVAL = 2.0
+
+INSERT_LOG_QUERY = """
+    INSERT INTO logs (user_id, action, table_cible, cible_id, details, date_action)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+def current_timestamp():
+    """Horodatage au format de CURRENT_TIMESTAMP (UTC), pris au moment de l'action"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class AuditLogWriter:
+    """Écrit les entrées de la table logs par lots
+    
+    - Mode asynchrone : les entrées sont mises en mémoire et un thread d'arrière-plan
+      les insère en une seule transaction dès que le lot est plein ou que le délai
+      est écoulé. close() écrit les entrées restantes.
+    - Mode synchrone (asynchronous=False) : chaque entrée est écrite immédiatement,
+      comme avant (utile pour les tests et les scripts).
+    """
+    
+    def __init__(self, pool, asynchronous=True, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_INTERVAL):
+        self.pool = pool
+        self.asynchronous = asynchronous
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        self._buffer = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+        
+        if asynchronous:
+            self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+            self._thread.start()
+    
+    def write(self, entries):
+        """Enregistre des entrées (user_id, action, table_cible, cible_id, details, date_action)"""
+        if not entries:
+            return
+        
+        if not self.asynchronous or self._closed:
+            self._insert(entries)
+            return
+        
+        with self._condition:
+            self._buffer.extend(entries)
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+    
+    def flush(self):
+        """Écrit immédiatement toutes les entrées en attente"""
+        with self._condition:
+            entries = self._buffer
+            self._buffer = []
+        self._insert(entries)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._closed and len(self._buffer) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                entries = self._buffer
+                self._buffer = []
+                closed = self._closed
+            
+            self._insert(entries)
+            
+            if closed:
+                return
+    
+    def _insert(self, entries):
+        if not entries:
+            return
+        
+        with self.pool.writer() as connection:
+            try:
+                connection.executemany(INSERT_LOG_QUERY, entries)
+                connection.commit()
+            except sqlite3.Error as e:
+                connection.rollback()
+                print(f"Erreur lors de l'enregistrement de {len(entries)} log(s): {e}")
+    
+    def close(self):
+        """Arrête le thread d'écriture après avoir écrit les entrées restantes"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        
+        self.flush()
@@ -0,0 +1,141 @@
+"""Exécution des requêtes de l'interface en arrière-plan"""
+import queue
+import tkinter as tk
+from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LoadingIndicator(ttk.Frame):
+    """Indicateur « Chargement... » affiché tant qu'une requête est en cours"""
+    
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.label = ttk.Label(self, text="")
+        self.label.pack(side=tk.LEFT, padx=(0, 5))
+        self.progress = ttk.Progressbar(self, mode="indeterminate", length=80)
+        self.active = False
+    
+    def start(self):
+        if self.active:
+            return
+        self.active = True
+        self.label.config(text="Chargement...")
+        self.progress.pack(side=tk.LEFT)
+        self.progress.start(15)
+    
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.label.config(text="")
+
+
+class BackgroundExecutor:
+    """Exécute les appels aux managers sur des threads et rend les résultats au thread Tk
+    
+    Chaque requête est identifiée par une clé (ex: 'contacts') : une nouvelle requête
+    remplace la précédente de même clé, dont le résultat est ignoré (annulée si elle
+    n'a pas encore démarré). Les résultats sont relevés par root.after et les callbacks
+    sont toujours appelés dans le thread de l'interface.
+    """
+    
+    POLL_INTERVAL = 30
+    
+    def __init__(self, root, max_workers=2, indicator=None):
+        self.root = root
+        self.indicator = indicator
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ui-query")
+        self._results = queue.Queue()
+        self._active = {}
+        self._generation = 0
+        self._poll_id = None
+    
+    def submit(self, key, func, *args, on_done=None, on_error=None, **kwargs):
+        """Lance func(*args, **kwargs) en arrière-plan
+        
+        on_done(résultat) ou on_error(exception) est appelé dans le thread Tk,
+        sauf si la requête a été remplacée ou annulée entre-temps.
+        """
+        self.cancel(key)
+        
+        self._generation += 1
+        generation = self._generation
+        future = self._pool.submit(self._run, key, generation, func, args, kwargs)
+        self._active[key] = (generation, future, on_done, on_error)
+        
+        self._update_indicator()
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+    
+    def cancel(self, key):
+        """Abandonne la requête en cours pour cette clé"""
+        request = self._active.pop(key, None)
+        if request:
+            request[1].cancel()
+            self._update_indicator()
+    
+    def _run(self, key, generation, func, args, kwargs):
+        try:
+            self._results.put((key, generation, True, func(*args, **kwargs)))
+        except Exception as e:
+            self._results.put((key, generation, False, e))
+    
+    def _poll(self):
+        self._poll_id = None
+        
+        while True:
+            try:
+                key, generation, success, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            
+            request = self._active.get(key)
+            if not request or request[0] != generation:
+                # Requête remplacée ou annulée : résultat périmé
+                continue
+            
+            del self._active[key]
+            self._update_indicator()
+            
+            _, _, on_done, on_error = request
+            try:
+                if success:
+                    if on_done:
+                        on_done(value)
+                elif on_error:
+                    on_error(value)
+                else:
+                    print(f"Erreur lors du chargement ({key}): {value}")
+            except tk.TclError:
+                # Widget détruit pendant le chargement (déconnexion, fermeture)
+                pass
+            except Exception as e:
+                # Une erreur d'affichage ne doit pas interrompre la relève des autres requêtes
+                print(f"Erreur lors de l'affichage du résultat ({key}): {e}")
+        
+        if self._active and self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+    
+    def _update_indicator(self):
+        if self.indicator is None:
+            return
+        try:
+            if self._active:
+                self.indicator.start()
+            else:
+                self.indicator.stop()
+        except tk.TclError:
+            pass
+    
+    def shutdown(self):
+        """Abandonne les requêtes en attente et attend la fin de celles en cours"""
+        self._active.clear()
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass
+            self._poll_id = None
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,81 @@
+"""Colonnes numériques et calculs vectorisés pour les statistiques
+
+NumPy est utilisé s'il est installé ; sinon les colonnes sont des array.array
+et les calculs sont faits en Python pur, avec les mêmes résultats.
+"""
+import array
+from itertools import accumulate
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+# Codes de type des colonnes numériques (ceux de array.array)
+INTEGER = 'q'
+FLOAT = 'd'
+
+_NUMPY_DTYPES = {INTEGER: 'int64', FLOAT: 'float64'}
+
+
+def to_column(values, typecode):
+    """Colonne numérique à partir d'une séquence (None -> 0)"""
+    values = [value or 0 for value in values]
+    if NUMPY_AVAILABLE:
+        return np.array(values, dtype=_NUMPY_DTYPES[typecode])
+    return array.array(typecode, values)
+
+
+def to_list(column):
+    """Liste de valeurs Python (int/float) à partir d'une colonne"""
+    if NUMPY_AVAILABLE and isinstance(column, np.ndarray):
+        return column.tolist()
+    return list(column)
+
+
+def cumulative_sum(column):
+    """Somme cumulée"""
+    if NUMPY_AVAILABLE:
+        return np.cumsum(column)
+    return array.array(column.typecode, accumulate(column))
+
+
+def rolling_mean(column, window):
+    """Moyenne mobile sur les `window` dernières valeurs (moins en début de série)"""
+    if window < 1:
+        raise ValueError("La fenêtre doit contenir au moins une valeur")
+    
+    if NUMPY_AVAILABLE:
+        sums = np.concatenate(([0.0], np.cumsum(column, dtype='float64')))
+        ends = np.arange(1, len(column) + 1)
+        starts = np.maximum(ends - window, 0)
+        return (sums[ends] - sums[starts]) / (ends - starts)
+    
+    sums = [0.0] + list(accumulate(float(value) for value in column))
+    result = array.array(FLOAT)
+    for end in range(1, len(column) + 1):
+        start = max(end - window, 0)
+        result.append((sums[end] - sums[start]) / (end - start))
+    return result
+
+
+def percentiles(column, ranks):
+    """Percentiles (interpolation linéaire, comme numpy.percentile) : {rang: valeur}"""
+    if len(column) == 0:
+        return {rank: 0.0 for rank in ranks}
+    
+    if NUMPY_AVAILABLE:
+        values = np.percentile(column, ranks)
+        return {rank: float(value) for rank, value in zip(ranks, values)}
+    
+    values = sorted(column)
+    result = {}
+    for rank in ranks:
+        position = (len(values) - 1) * rank / 100
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+        result[rank] = float(values[lower] + (values[upper] - values[lower]) * (position - lower))
+    return result
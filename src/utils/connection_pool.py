@@ -0,0 +1,141 @@
+"""Pool de connexions SQLite : un écrivain partagé et des lecteurs par thread"""
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """Gère une connexion d'écriture unique et plusieurs connexions de lecture
+    
+    - L'écrivain est protégé par un verrou réentrant : un seul thread écrit à la fois.
+    - Chaque thread emprunte un lecteur (réutilisé en cas d'emprunts imbriqués)
+      et le rend au pool à la fin du bloc.
+    - Le mode WAL permet aux lecteurs de travailler pendant une écriture.
+    """
+    
+    def __init__(self, db_path, max_readers=4, timeout=30, pragmas=None):
+        self.db_path = db_path
+        self.max_readers = max_readers
+        self.timeout = timeout
+        
+        # PRAGMA appliqués à chaque connexion (journal_mode : écrivain uniquement)
+        self.pragmas = dict(pragmas or {'journal_mode': 'WAL'})
+        self._pragmas_version = 0
+        self._reader_versions = {}
+        
+        self._write_lock = threading.RLock()
+        self._write_owner = None
+        self._write_depth = 0
+        
+        self._readers = queue.LifoQueue()
+        self._readers_created = 0
+        self._readers_lock = threading.Lock()
+        self._all_readers = []
+        self._local = threading.local()
+        
+        self.writer_connection = self._open_connection()
+        self._apply_pragmas(self.writer_connection, writer=True)
+    
+    def _open_connection(self, read_only=False):
+        connection = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA foreign_keys = ON")
+        if read_only:
+            connection.execute("PRAGMA query_only = ON")
+        return connection
+    
+    def _apply_pragmas(self, connection, writer=False):
+        for name, value in self.pragmas.items():
+            if name == 'journal_mode' and not writer:
+                continue
+            connection.execute(f"PRAGMA {name} = {value}")
+    
+    def configure(self, pragmas):
+        """Applique de nouveaux PRAGMA
+        
+        L'écrivain est reconfiguré immédiatement, chaque lecteur lors de son prochain emprunt.
+        """
+        with self._write_lock:
+            self.pragmas = dict(pragmas)
+            self._pragmas_version += 1
+            self._apply_pragmas(self.writer_connection, writer=True)
+    
+    @contextmanager
+    def writer(self):
+        """Emprunte la connexion d'écriture (exclusive entre threads, réentrante)"""
+        with self._write_lock:
+            self._write_owner = threading.get_ident()
+            self._write_depth += 1
+            try:
+                yield self.writer_connection
+            finally:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self._write_owner = None
+    
+    def owns_writer(self):
+        """Indique si le thread courant détient la connexion d'écriture"""
+        return self._write_owner == threading.get_ident()
+    
+    @contextmanager
+    def reader(self):
+        """Emprunte une connexion de lecture pour le thread courant"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            # Emprunt imbriqué dans le même thread : réutiliser la connexion
+            self._local.depth += 1
+            try:
+                yield connection
+            finally:
+                self._local.depth -= 1
+            return
+        
+        connection = self._acquire_reader()
+        if self._reader_versions.get(id(connection)) != self._pragmas_version:
+            self._apply_pragmas(connection)
+            self._reader_versions[id(connection)] = self._pragmas_version
+        self._local.connection = connection
+        self._local.depth = 1
+        try:
+            yield connection
+        finally:
+            self._local.connection = None
+            self._local.depth = 0
+            self._readers.put(connection)
+    
+    def _acquire_reader(self):
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._readers_lock:
+            if self._readers_created < self.max_readers:
+                self._readers_created += 1
+                connection = self._open_connection(read_only=True)
+                self._all_readers.append(connection)
+                return connection
+        
+        # Tous les lecteurs sont empruntés : attendre qu'un thread en rende un
+        try:
+            return self._readers.get(timeout=self.timeout)
+        except queue.Empty:
+            # Erreur SQLite : les appelants la traitent comme les autres erreurs de requête
+            raise sqlite3.OperationalError("database pool exhausted") from None
+    
+    def close(self):
+        """Ferme toutes les connexions du pool"""
+        with self._readers_lock:
+            for connection in self._all_readers:
+                try:
+                    connection.close()
+                except sqlite3.Error:
+                    pass
+            self._all_readers = []
+            self._reader_versions = {}
+            self._readers_created = 0
+            self._readers = queue.LifoQueue()
+        
+        with self._write_lock:
+            self.writer_connection.close()
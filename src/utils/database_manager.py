@@ -1,82 +1,311 @@
 import sqlite3
 import os
+from contextlib import contextmanager
 from datetime import datetime
 
+from utils.connection_pool import ConnectionPool
+from utils.audit_log import AuditLogWriter, current_timestamp
+from utils.columnar import to_column
+
+
+class Record(sqlite3.Row):
+    """Ligne de résultat légère : tuple de valeurs + index des colonnes partagé par le curseur
+    
+    Accès par nom (row['nom']) ou par position, keys() et get() comme un dict,
+    sans allouer de dictionnaire par ligne. Lecture seule.
+    """
+    
+    __slots__ = ()
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except IndexError:
+            return default
+
+
+# Profils de stockage : PRAGMA appliqués à la connexion
+# Le journal reste en WAL dans tous les profils (requis par les lecteurs concurrents)
+STORAGE_PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    },
+    'bulk': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -256000,
+        'mmap_size': 1073741824,
+        'temp_store': 'MEMORY',
+    },
+}
+
+DEFAULT_STORAGE_PROFILE = 'balanced'
+
+# Lignes lues par fetchmany lors d'un parcours en flux (iter_query)
+ITER_BATCH_SIZE = 500
+
+# Migrations versionnées (PRAGMA user_version) : (version, script SQL dans data/)
+# Les scripts sont idempotents (IF NOT EXISTS) : une base créée avant le
+# versionnement (user_version = 0) peut les rejouer sans risque.
+SCHEMA_MIGRATIONS = [
+    (1, '001_CREATE_TABLES.sql'),
+    (2, '004_CREATE_SEARCH_INDEX.sql'),
+    (3, '005_CREATE_INDEXES.sql'),
+    (4, '006_CREATE_STATS_TABLES.sql'),
+]
+
+# Migration ignorée si SQLite est compilé sans FTS5 (la recherche retombe sur LIKE)
+SEARCH_INDEX_SCRIPT = '004_CREATE_SEARCH_INDEX.sql'
+
+# Statistiques matérialisées : remplies à partir des données existantes après migration
+STATS_SCRIPT = '006_CREATE_STATS_TABLES.sql'
+
+STATS_REBUILD_QUERIES = [
+    "DELETE FROM stats_counters",
+    """
+        INSERT INTO stats_counters (nom, valeur)
+        SELECT 'total_contacts', COUNT(*) FROM contacts UNION ALL
+        SELECT 'total_interactions', COUNT(*) FROM interactions UNION ALL
+        SELECT 'rappels_actifs', COUNT(*) FROM rappels WHERE traite = 0 UNION ALL
+        SELECT 'total_taches', COUNT(*) FROM taches UNION ALL
+        SELECT 'taches_en_cours', COUNT(*) FROM taches WHERE statut = 'En cours' UNION ALL
+        SELECT 'total_tags', COUNT(*) FROM tags UNION ALL
+        SELECT 'total_projets', COUNT(*) FROM projets
+    """,
+    "DELETE FROM stats_contacts_repartition",
+    """
+        INSERT INTO stats_contacts_repartition (dimension, valeur, nombre)
+        SELECT 'categorie', categorie, COUNT(*) FROM contacts
+        WHERE categorie IS NOT NULL AND categorie != '' GROUP BY categorie
+        UNION ALL
+        SELECT 'ville', adresse_ville, COUNT(*) FROM contacts
+        WHERE adresse_ville IS NOT NULL AND adresse_ville != '' GROUP BY adresse_ville
+        UNION ALL
+        SELECT 'pays', adresse_pays, COUNT(*) FROM contacts
+        WHERE adresse_pays IS NOT NULL AND adresse_pays != '' GROUP BY adresse_pays
+    """,
+    "DELETE FROM stats_tags",
+    """
+        INSERT INTO stats_tags (tag_id, nombre)
+        SELECT t.id, COUNT(ct.contact_id) FROM tags t
+        LEFT JOIN contact_tags ct ON ct.tag_id = t.id
+        GROUP BY t.id
+    """,
+]
+
 
 class DatabaseManager:
     
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, max_readers=4, async_audit_log=True):
         if db_path is None:
             # Utiliser le chemin absolu vers la racine du projet
             project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
             db_path = os.path.join(project_root, "data", "app.db")
         self.db_path = db_path
+        self.max_readers = max_readers
+        self.async_audit_log = async_audit_log
+        self.pool = None
+        self.audit_log = None
         self.connection = None
         self.cursor = None
+        self.fts_enabled = False
+        self.storage_profile = DEFAULT_STORAGE_PROFILE
+        self._transaction_depth = 0
+        self._transaction_failed = False
+        self._transaction_logs = []
+        self._transaction_callbacks = []
         self.connect()
         self.initialize_database()
     
     def connect(self):
         try:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
+            # Connexion d'écriture (WAL) + lecteurs empruntés par thread
+            self.pool = ConnectionPool(self.db_path, max_readers=self.max_readers)
+            self.connection = self.pool.writer_connection
             self.cursor = self.connection.cursor()
-            self.cursor.execute("PRAGMA foreign_keys = ON")
+            self.audit_log = AuditLogWriter(self.pool, asynchronous=self.async_audit_log)
+            self.apply_storage_profile(self.get_setting('storage_profile', DEFAULT_STORAGE_PROFILE))
             return True
         except sqlite3.Error as e:
             print(f"Erreur de connexion à la base de données: {e}")
             return False
     
     def initialize_database(self):
-        script_path = os.path.join(os.path.dirname(__file__), '../../data/001_CREATE_TABLES.sql')
-        
-        if os.path.exists(script_path):
-            try:
-                with open(script_path, 'r', encoding='utf-8') as f:
-                    sql_script = f.read()
-                self.cursor.executescript(sql_script)
-                self.connection.commit()
-            except Exception as e:
-                print(f"Erreur lors de l'initialisation de la base de données: {e}")
-        
-        self.create_settings_table()
+        self.run_migrations()
+        self.fts_enabled = self.table_exists('contacts_fts')
         self.create_default_user()
     
-    def create_settings_table(self):
+    def run_migrations(self):
+        """Applique en une seule transaction les migrations au-delà de PRAGMA user_version
+        
+        Une base à jour ne rejoue aucun script.
+        """
+        data_dir = os.path.join(os.path.dirname(__file__), '../../data')
+        current_version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        if current_version and not self.table_exists('users'):
+            # Tables supprimées sans remise à zéro de la version : tout recréer
+            current_version = 0
+        pending = [(version, script) for version, script in SCHEMA_MIGRATIONS if version > current_version]
+        
+        if not pending:
+            return True
+        
+        scripts = []
+        for version, script_name in pending:
+            if script_name == SEARCH_INDEX_SCRIPT and not self.fts5_available():
+                print("Index plein texte indisponible: SQLite compilé sans FTS5")
+                continue
+            
+            with open(os.path.join(data_dir, script_name), 'r', encoding='utf-8') as f:
+                scripts.append(f"-- Migration {version} : {script_name}\n{f.read()}")
+        
+        target_version = pending[-1][0]
+        
         try:
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS app_settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            self.connection.commit()
-        except Exception as e:
-            print(f"Erreur lors de la création de la table settings: {e}")
+            self.cursor.executescript(
+                "BEGIN;\n" + ";\n".join(scripts) + f";\nPRAGMA user_version = {target_version};\nCOMMIT;"
+            )
+        except sqlite3.Error as e:
+            print(f"Erreur lors de la migration de la base (version {current_version} -> {target_version}): {e}")
+            self.connection.rollback()
+            return False
+        
+        # Index plein texte créé sur une base existante : le remplir à partir des contacts
+        if any(script == SEARCH_INDEX_SCRIPT for _, script in pending) and self.table_exists('contacts_fts'):
+            self.fts_enabled = True
+            self.rebuild_search_index()
+        
+        if any(script == STATS_SCRIPT for _, script in pending):
+            self.rebuild_statistics()
+        
+        return True
+    
+    def table_exists(self, table_name):
+        result = self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).fetchone()
+        return result is not None
+    
+    def fts5_available(self):
+        options = [row[0] for row in self.cursor.execute("PRAGMA compile_options").fetchall()]
+        return 'ENABLE_FTS5' in options
+    
+    def rebuild_search_index(self):
+        """Reconstruit entièrement l'index plein texte des contacts"""
+        if not self.fts_enabled:
+            return False
+        
+        with self.pool.writer() as connection:
+            try:
+                connection.execute("DELETE FROM contacts_fts")
+                connection.execute("""
+                    INSERT INTO contacts_fts (rowid, nom, prenom, societe, poste, ville, coordonnees, notes)
+                    SELECT c.id, c.nom, c.prenom, c.societe, c.poste, c.adresse_ville,
+                           (SELECT group_concat(valeur, ' ') FROM coordonnees WHERE contact_id = c.id),
+                           c.notes
+                    FROM contacts c
+                """)
+                connection.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"Erreur lors de la reconstruction de l'index plein texte: {e}")
+                connection.rollback()
+                return False
+    
+    def rebuild_statistics(self):
+        """Recalcule entièrement les statistiques matérialisées
+        
+        Les triggers les tiennent ensuite à jour à chaque écriture.
+        """
+        with self.pool.writer() as connection:
+            try:
+                for query in STATS_REBUILD_QUERIES:
+                    connection.execute(query)
+                connection.commit()
+                return True
+            except sqlite3.Error as e:
+                print(f"Erreur lors du recalcul des statistiques: {e}")
+                connection.rollback()
+                return False
     
     def get_setting(self, key, default=None):
         try:
-            self.cursor.execute("SELECT value FROM app_settings WHERE key = ?", (key,))
-            result = self.cursor.fetchone()
+            with self.read_connection() as connection:
+                result = connection.execute("SELECT value FROM app_settings WHERE key = ?", (key,)).fetchone()
             return result[0] if result else default
         except Exception:
             return default
     
     def set_setting(self, key, value):
-        try:
-            self.cursor.execute("""
-                INSERT INTO app_settings (key, value, updated_at)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(key) DO UPDATE SET 
-                    value = excluded.value,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (key, value))
-            self.connection.commit()
-            return True
-        except Exception as e:
-            print(f"Erreur lors de la sauvegarde du paramètre: {e}")
+        with self.pool.writer() as connection:
+            try:
+                connection.execute("""
+                    INSERT INTO app_settings (key, value, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(key) DO UPDATE SET 
+                        value = excluded.value,
+                        updated_at = CURRENT_TIMESTAMP
+                """, (key, value))
+                self._commit(connection)
+                return True
+            except Exception as e:
+                print(f"Erreur lors de la sauvegarde du paramètre: {e}")
+                return False
+    
+    def apply_storage_profile(self, profile):
+        """Applique un profil de stockage (durable, balanced, bulk) aux connexions"""
+        if profile not in STORAGE_PROFILES:
+            print(f"Profil de stockage inconnu: {profile}, utilisation de '{DEFAULT_STORAGE_PROFILE}'")
+            profile = DEFAULT_STORAGE_PROFILE
+        
+        # Sous le verrou d'écriture : profil courant cohérent avec temporary_storage_profile
+        with self.pool.writer():
+            try:
+                self.pool.configure(STORAGE_PROFILES[profile])
+                self.storage_profile = profile
+                return True
+            except sqlite3.Error as e:
+                print(f"Erreur lors de l'application du profil de stockage: {e}")
+                return False
+    
+    def set_storage_profile(self, profile):
+        """Change le profil de stockage et l'enregistre dans les paramètres"""
+        if profile not in STORAGE_PROFILES:
             return False
+        
+        return self.apply_storage_profile(profile) and self.set_setting('storage_profile', profile)
+    
+    @contextmanager
+    def temporary_storage_profile(self, profile):
+        """Applique un profil aux écritures d'un bloc (ex: 'bulk' pour un lot d'import), sans l'enregistrer
+        
+        Seule la connexion d'écriture est modifiée, et elle reste détenue pendant tout
+        le bloc : les écritures des autres threads attendent la fin du bloc et les
+        lecteurs gardent le profil courant, rétabli sur l'écrivain sous le même verrou.
+        """
+        with self.pool.writer() as connection:
+            self._apply_writer_pragmas(connection, STORAGE_PROFILES[profile])
+            try:
+                yield connection
+            finally:
+                self._apply_writer_pragmas(connection, STORAGE_PROFILES[self.storage_profile])
+    
+    def _apply_writer_pragmas(self, connection, pragmas):
+        # Le journal reste en WAL : seuls les autres PRAGMA varient d'un profil à l'autre
+        for name, value in pragmas.items():
+            if name != 'journal_mode':
+                connection.execute(f"PRAGMA {name} = {value}")
     
     def create_default_user(self):
         import hashlib
@@ -97,68 +326,235 @@ class DatabaseManager:
         except Exception as e:
             print(f"Erreur lors de la création de l'utilisateur par défaut: {e}")
     
+    @contextmanager
+    def transaction(self):
+        """Regroupe plusieurs écritures dans une seule transaction (un seul commit)
+        
+        Les blocs imbriqués et les appels execute_* faits à l'intérieur participent
+        à la transaction englobante : le commit n'a lieu qu'à la sortie du bloc le
+        plus externe. Si une écriture échoue ou qu'une exception est levée, tout est
+        annulé et une sqlite3.Error est levée à la sortie du bloc externe.
+        
+        Les logs émis dans le bloc ne sont transmis au journal d'audit qu'après le commit,
+        de même que les callbacks enregistrés par after_commit.
+        """
+        with self.pool.writer() as connection:
+            outermost = self._transaction_depth == 0
+            if outermost:
+                self._transaction_failed = False
+                if not connection.in_transaction:
+                    connection.execute("BEGIN")
+            
+            self._transaction_depth += 1
+            try:
+                yield connection
+            except BaseException:
+                self._transaction_failed = True
+                raise
+            finally:
+                self._transaction_depth -= 1
+                if outermost:
+                    failed = self._transaction_failed
+                    logs = self._transaction_logs
+                    callbacks = self._transaction_callbacks
+                    self._transaction_failed = False
+                    self._transaction_logs = []
+                    self._transaction_callbacks = []
+                    if failed:
+                        connection.rollback()
+                    else:
+                        connection.commit()
+                        self.audit_log.write(logs)
+                        for callback in callbacks:
+                            callback()
+            
+            if outermost and failed:
+                raise sqlite3.DatabaseError("Transaction annulée suite à une erreur d'écriture")
+    
+    def after_commit(self, callback):
+        """Appelle callback() une fois les écritures en cours validées
+        
+        Dans une transaction, l'appel est différé au commit du bloc le plus externe et
+        abandonné en cas d'annulation ; hors transaction, il est immédiat. Sert à tenir
+        à jour des caches en mémoire (ex: index des tags) sans refléter une écriture annulée.
+        """
+        if self.pool.owns_writer() and self._transaction_depth > 0:
+            self._transaction_callbacks.append(callback)
+        else:
+            callback()
+    
+    def _commit(self, connection):
+        # Dans une transaction, le commit est différé au bloc le plus externe
+        if self._transaction_depth == 0:
+            connection.commit()
+    
+    def _rollback(self, connection):
+        if self._transaction_depth == 0:
+            connection.rollback()
+        else:
+            self._transaction_failed = True
+    
+    @contextmanager
+    def read_connection(self):
+        """Connexion pour une lecture : l'écrivain si le thread le détient, sinon un lecteur du pool"""
+        if self.pool.owns_writer():
+            yield self.pool.writer_connection
+        else:
+            with self.pool.reader() as connection:
+                yield connection
+    
     def execute_query(self, query, params=None):
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            return [dict(row) for row in self.cursor.fetchall()]
+            with self.read_connection() as connection:
+                cursor = connection.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                return [dict(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             print(f"Erreur d'exécution de la requête: {e}")
             return None
     
-    def execute_insert(self, query, params=None):
+    def execute_records(self, query, params=None):
+        """Comme execute_query, mais des lignes Record au lieu de dictionnaires"""
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            return self.cursor.lastrowid
+            with self.read_connection() as connection:
+                cursor = connection.cursor()
+                cursor.row_factory = Record
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                return cursor.fetchall()
         except sqlite3.Error as e:
-            print(f"Erreur d'insertion: {e}")
-            self.connection.rollback()
+            print(f"Erreur d'exécution de la requête: {e}")
             return None
     
-    def execute_update(self, query, params=None):
-        try:
+    def iter_query(self, query, params=None, batch_size=ITER_BATCH_SIZE):
+        """Parcourt le résultat en flux (lignes Record), par lots de batch_size (fetchmany)
+        
+        La mémoire utilisée ne dépend pas de la taille du résultat. La connexion de
+        lecture reste réservée jusqu'à la fin du parcours : consommer le générateur
+        entièrement (ou le fermer) sans écrire entre-temps.
+        
+        Contrairement à execute_query, les erreurs SQLite sont levées : un parcours
+        interrompu ne doit pas passer pour un résultat complet (export tronqué).
+        """
+        with self.read_connection() as connection:
+            cursor = connection.cursor()
+            cursor.row_factory = Record
             if params:
-                self.cursor.execute(query, params)
+                cursor.execute(query, params)
             else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            return True
-        except sqlite3.Error as e:
-            print(f"Erreur de mise à jour: {e}")
-            self.connection.rollback()
-            return False
+                cursor.execute(query)
+            
+            rows = cursor.fetchmany(batch_size)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(batch_size)
     
-    def execute_delete(self, query, params=None):
+    def execute_columns(self, query, params=None, numeric=None):
+        """Résultat en colonnes : {nom_colonne: valeurs}
+        
+        numeric : {nom_colonne: code de type} (columnar.INTEGER / columnar.FLOAT) ;
+        ces colonnes sont des tableaux NumPy (array.array sans NumPy), les autres
+        des listes. Aucun dictionnaire n'est construit par ligne.
+        """
+        numeric = numeric or {}
         try:
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            self.connection.commit()
-            return True
+            with self.read_connection() as connection:
+                cursor = connection.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                names = [description[0] for description in cursor.description]
+                rows = cursor.fetchall()
         except sqlite3.Error as e:
-            print(f"Erreur de suppression: {e}")
-            self.connection.rollback()
-            return False
+            print(f"Erreur d'exécution de la requête: {e}")
+            return None
+        
+        values = list(zip(*rows)) if rows else [()] * len(names)
+        return {
+            name: to_column(column, numeric[name]) if name in numeric else list(column)
+            for name, column in zip(names, values)
+        }
+    
+    def execute_insert(self, query, params=None):
+        with self.pool.writer() as connection:
+            try:
+                cursor = connection.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                self._commit(connection)
+                return cursor.lastrowid
+            except sqlite3.Error as e:
+                print(f"Erreur d'insertion: {e}")
+                self._rollback(connection)
+                return None
+    
+    def execute_update(self, query, params=None):
+        with self.pool.writer() as connection:
+            try:
+                cursor = connection.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                self._commit(connection)
+                return True
+            except sqlite3.Error as e:
+                print(f"Erreur de mise à jour: {e}")
+                self._rollback(connection)
+                return False
+    
+    def execute_delete(self, query, params=None):
+        with self.pool.writer() as connection:
+            try:
+                cursor = connection.cursor()
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                self._commit(connection)
+                return True
+            except sqlite3.Error as e:
+                print(f"Erreur de suppression: {e}")
+                self._rollback(connection)
+                return False
+    
+    def execute_many(self, query, params_list):
+        """Exécute une requête pour chaque jeu de paramètres dans une seule transaction"""
+        with self.pool.writer() as connection:
+            try:
+                cursor = connection.cursor()
+                cursor.executemany(query, params_list)
+                self._commit(connection)
+                return cursor.rowcount
+            except sqlite3.Error as e:
+                print(f"Erreur d'exécution par lot: {e}")
+                self._rollback(connection)
+                return None
     
     def log_action(self, user_id, action, table_cible=None, cible_id=None, details=None):
-        try:
-            self.cursor.execute("""
-                INSERT INTO logs (user_id, action, table_cible, cible_id, details)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, action, table_cible, cible_id, details))
-            self.connection.commit()
-        except Exception as e:
-            print(f"Erreur lors de l'enregistrement du log: {e}")
+        """Ajoute une entrée au journal d'audit (écrite par lots en arrière-plan)"""
+        entry = (user_id, action, table_cible, cible_id, details, current_timestamp())
+        
+        if self.pool.owns_writer() and self._transaction_depth > 0:
+            # Conservé jusqu'au commit de la transaction, abandonné en cas d'annulation
+            self._transaction_logs.append(entry)
+        else:
+            self.audit_log.write([entry])
+    
+    def flush_audit_log(self):
+        """Écrit immédiatement les logs en attente (avant une lecture de la table logs)"""
+        if self.audit_log:
+            self.audit_log.flush()
     
     def backup_database(self, backup_path=None):
-        import shutil
         from datetime import datetime
         
         if backup_path is None:
@@ -166,11 +562,20 @@ class DatabaseManager:
             backup_path = f"backup_contacts_{timestamp}.db"
         
         try:
-            shutil.copy2(self.db_path, backup_path)
+            # API de sauvegarde SQLite : inclut les pages encore dans le journal WAL
+            backup = sqlite3.connect(backup_path)
+            try:
+                with self.pool.reader() as connection:
+                    connection.backup(backup)
+            finally:
+                backup.close()
             return True, backup_path
         except Exception as e:
             return False, str(e)
     
     def close(self):
-        if self.connection:
-            self.connection.close()
+        if self.audit_log:
+            self.audit_log.close()
+            self.audit_log = None
+        if self.pool:
+            self.pool.close()